@@ -345,7 +345,7 @@ def main():
     print("8. 结果保存与统计")
     
     print("\n  下一步:")
-    print("1. 运行完整测试: python tests/test4.py")
+    print("1. 运行完整测试: python -m pytest tests/test_day4.py")
     print("2. 集成demo2的代码数据")
     print("3. 集成demo3的Issue和PR数据")
     print("4. 准备demo5：问答引擎开发")
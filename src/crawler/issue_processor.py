@@ -4,11 +4,22 @@ Issue和PR数据处理模块
 """
 
 import re
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Markdown链接 [text](url) 与直接URL 合并为一个模式，一次扫描完成；
+# 位于Markdown链接内部的URL不会再被重复匹配为直接URL
+_LINK_RE = re.compile(
+    r'\[(?P<md_text>[^\]]+)\]\((?P<md_url>[^)]+)\)'
+    r'|(?P<bare>https?://[^\s<>"]+|www\.[^\s<>"]+)'
+)
+
+# 摘要预览中的换行替换为空格
+_NL_TABLE = str.maketrans({'\n': ' ', '\r': ' '})
+
 class IssueProcessor:
     """Issue和PR数据处理器"""
     
@@ -16,6 +27,24 @@ class IssueProcessor:
         """初始化处理器"""
         pass
     
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def _compiled(pattern: str, flags: int = 0) -> "re.Pattern":
+        """
+        获取编译后的正则（有界LRU缓存）
+        
+        动态生成的模式（如按标签构造的正则）较多时，re模块内置缓存可能被挤占，
+        这里单独缓存本模块用到的模式。
+        
+        Args:
+            pattern: 正则表达式
+            flags: 正则标志
+            
+        Returns:
+            编译后的正则对象
+        """
+        return re.compile(pattern, flags)
+    
     def extract_code_blocks(self, text: str) -> List[Dict[str, Any]]:
         """
         从文本中提取代码块
@@ -33,7 +62,7 @@ class IssueProcessor:
         
         # 匹配Markdown代码块
         pattern = r'```(\w*)\n(.*?)```'
-        matches = re.findall(pattern, text, re.DOTALL)
+        matches = self._compiled(pattern, re.DOTALL).findall(text)
         
         for language, code in matches:
             code_block = {
@@ -61,27 +90,20 @@ class IssueProcessor:
         
         links = []
         
-        # 匹配Markdown链接 [text](url)
-        md_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-        md_matches = re.findall(md_pattern, text)
-        
-        for link_text, url in md_matches:
-            links.append({
-                "type": "markdown_link",
-                "text": link_text,
-                "url": url
-            })
-        
-        # 匹配直接URL
-        url_pattern = r'https?://[^\s<>"]+|www\.[^\s<>"]+'
-        url_matches = re.findall(url_pattern, text)
-        
-        for url in url_matches:
-            links.append({
-                "type": "direct_url",
-                "text": url,
-                "url": url
-            })
+        for match in _LINK_RE.finditer(text):
+            if match.group("md_url"):
+                links.append({
+                    "type": "markdown_link",
+                    "text": match.group("md_text"),
+                    "url": match.group("md_url")
+                })
+            else:
+                url = match.group("bare")
+                links.append({
+                    "type": "direct_url",
+                    "text": url,
+                    "url": url
+                })
         
         logger.info(f"提取链接: {len(links)}个")
         return links
@@ -97,14 +119,15 @@ class IssueProcessor:
         Returns:
             引用列表
         """
-        if not text:
+        # 绝大多数正文不含'#'，先做子串检查再进入正则引擎
+        if not text or '#' not in text:
             return []
         
         references = []
         
         # 匹配 #数字 格式的引用
         pattern = r'#(\d+)'
-        matches = re.findall(pattern, text)
+        matches = self._compiled(pattern).findall(text)
         
         for issue_num in matches:
             references.append({
@@ -116,7 +139,7 @@ class IssueProcessor:
         
         # 匹配 user/repo#数字 格式的跨仓库引用
         cross_repo_pattern = r'([\w-]+/[\w-]+)#(\d+)'
-        cross_matches = re.findall(cross_repo_pattern, text)
+        cross_matches = self._compiled(cross_repo_pattern).findall(text)
         
         for cross_repo, issue_num in cross_matches:
             references.append({
@@ -279,23 +302,29 @@ class IssueProcessor:
         user = issue.get("user", "匿名")
         state = issue.get("state", "未知")
         
-        # 构建摘要
-        summary = f"Issue #{number}: {title}\n"
-        summary += f"状态: {state} | 创建者: {user}\n"
+        # 构建摘要（逐行收集后一次拼接）
+        lines = [
+            f"Issue #{number}: {title}",
+            f"状态: {state} | 创建者: {user}"
+        ]
         
         if "body" in issue and issue["body"]:
-            body_preview = issue["body"][:200].replace('\n', ' ')
-            summary += f"内容预览: {body_preview}...\n"
+            body_preview = issue["body"][:200]
+            if '\n' in body_preview or '\r' in body_preview:
+                body_preview = body_preview.translate(_NL_TABLE)
+            lines.append(f"内容预览: {body_preview}...")
         
+        labels_line = ""
         if "labels" in issue and issue["labels"]:
-            summary += f"标签: {', '.join(issue['labels'][:5])}"
+            labels_line = f"标签: {', '.join(issue['labels'][:5])}"
             if len(issue["labels"]) > 5:
-                summary += f" 等{len(issue['labels'])}个"
+                labels_line += f" 等{len(issue['labels'])}个"
+        lines.append(labels_line)
         
-        return summary
+        return "\n".join(lines)
 
-def test_issue_processor():
-    """测试Issue处理器"""
+def run_issue_processor_demo():
+    """Issue处理器演示（不以test_开头，避免被导入测试模块时与同名测试冲突）"""
     print("=" * 60)
     print("Issue处理器测试")
     print("=" * 60)
@@ -382,4 +411,4 @@ def test_issue_processor():
     print("=" * 60)
 
 if __name__ == "__main__":
-    test_issue_processor()
\ No newline at end of file
+    run_issue_processor_demo()
\ No newline at end of file
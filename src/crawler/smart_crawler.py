@@ -4,6 +4,7 @@
 """
 
 import time
+from collections import Counter
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional
 import logging
@@ -203,11 +204,16 @@ class SmartGitHubCrawler(GitHubCrawler):
             print(" 无法获取Issue样本")
             return
         
-        # 3. 分析样本
+        # 3. 分析样本（单次遍历累计所有统计量）
         total_issues = len(sample_issues)
-        open_count = sum(1 for i in sample_issues if i.state == "open")
+        open_count = pr_count = total_comments = 0
+        label_counter = Counter()
+        for i in sample_issues:
+            open_count += (i.state == "open")
+            pr_count += i.is_pull_request
+            total_comments += i.comments
+            label_counter.update(i.labels)
         closed_count = total_issues - open_count
-        pr_count = sum(1 for i in sample_issues if i.is_pull_request)
         
         print(f"\n 样本分析结果 (基于 {total_issues} 个样本):")
         print(f"   开启率: {open_count/total_issues*100:.1f}%")
@@ -215,22 +221,13 @@ class SmartGitHubCrawler(GitHubCrawler):
         print(f"   PR比例: {pr_count/total_issues*100:.1f}%")
         
         # 评论分析
-        total_comments = sum(i.comments for i in sample_issues)
         avg_comments = total_comments / total_issues if total_issues > 0 else 0
         
         print(f"   平均评论数: {avg_comments:.1f}")
         
         # 标签分析
-        all_labels = []
-        for issue in sample_issues:
-            all_labels.extend(issue.labels)
-        
-        if all_labels:
-            label_counts = {}
-            for label in all_labels:
-                label_counts[label] = label_counts.get(label, 0) + 1
-            
-            top_labels = sorted(label_counts.items(), key=lambda x: x[1], reverse=True)[:5]
+        if label_counter:
+            top_labels = label_counter.most_common(5)
             print(f"   热门标签: {', '.join([f'{label}({count})' for label, count in top_labels])}")
         
         # 4. 估算总数
@@ -3,10 +3,13 @@ ChromaDB向量存储模块
 """
 import os
 import sys
+import queue
 import hashlib
+import threading
 from typing import List, Dict, Any, Optional
 from pathlib import Path
 from datetime import datetime
+import numpy as np
 
 # 添加当前目录到路径
 current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -22,6 +25,12 @@ except ImportError:
     CHROMADB_AVAILABLE = False
     print(" chromadb 不可用")
 
+try:
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
 try:
     from .embedding import TextEmbeddingModel
 except ImportError:
@@ -32,64 +41,105 @@ except ImportError:
 class ChromaVectorStore:
     """ChromaDB向量存储类"""
     
-    def __init__(self, collection_name: str = "code_repository", persist_dir: str = None):
+    def __init__(self, collection_name: str = "code_repository", persist_dir: str = None,
+                 persist: bool = True, hnsw_metadata: Dict[str, Any] = None,
+                 embedder: TextEmbeddingModel = None, client=None):
         """
         初始化向量存储
         
         Args:
             collection_name: 集合名称
             persist_dir: 持久化目录路径
+            persist: 是否持久化到磁盘；为False时使用内存中的EphemeralClient，
+                     写入无需落盘，适合测试
+            hnsw_metadata: 新建集合时的HNSW索引参数（如 {"hnsw:M": 8,
+                           "hnsw:construction_ef": 16}），覆盖默认设置；
+                           小规模测试集合可用较小的值减少建索引开销
+            embedder: 已初始化的嵌入模型，多个存储可共用同一个实例；为None时新建
+            client: 已创建的ChromaDB客户端；传入时直接复用（忽略persist和persist_dir），
+                    一个客户端可管理多个集合，避免每个存储各自打开SQLite和段管理器
         """
         if not CHROMADB_AVAILABLE:
             raise ImportError("chromadb 未安装，请运行: pip install chromadb")
         
-        # 设置持久化目录
-        if persist_dir is None:
-            # 使用项目根目录下的 chroma_data 目录
-            current_dir = os.path.dirname(os.path.abspath(__file__))
-            project_root = os.path.dirname(os.path.dirname(current_dir))
-            self.persist_dir = os.path.join(project_root, "chroma_data")
-        else:
-            self.persist_dir = persist_dir
-            
-        # 确保目录存在
-        os.makedirs(self.persist_dir, exist_ok=True)
-        
-        # 初始化嵌入模型
-        self.embedder = TextEmbeddingModel()
-        
-        # 初始化ChromaDB客户端
-        self.client = chromadb.PersistentClient(
-            path=self.persist_dir,
-            settings=Settings(
-                anonymized_telemetry=False,  # 禁用遥测
-                allow_reset=True
-            )
+        # 初始化嵌入模型（嵌入在ChromaDB外部计算，集合不使用默认嵌入函数）
+        self.embedder = embedder if embedder is not None else TextEmbeddingModel()
+        self.hnsw_metadata = dict(hnsw_metadata or {})
+        
+        settings = Settings(
+            anonymized_telemetry=False,  # 禁用遥测
+            allow_reset=True
         )
         
+        if client is not None:
+            self.persist_dir = None
+            self.client = client
+            location = "共享客户端"
+        elif persist:
+            # 设置持久化目录
+            if persist_dir is None:
+                # 使用项目根目录下的 chroma_data 目录
+                current_dir = os.path.dirname(os.path.abspath(__file__))
+                project_root = os.path.dirname(os.path.dirname(current_dir))
+                self.persist_dir = os.path.join(project_root, "chroma_data")
+            else:
+                self.persist_dir = persist_dir
+                
+            # 确保目录存在
+            os.makedirs(self.persist_dir, exist_ok=True)
+            
+            # 初始化ChromaDB客户端
+            self.client = chromadb.PersistentClient(path=self.persist_dir, settings=settings)
+            location = self.persist_dir
+        else:
+            # 内存客户端：同一进程内的EphemeralClient共享数据，集合名需各不相同
+            self.persist_dir = None
+            self.client = chromadb.EphemeralClient(settings=settings)
+            location = "内存（不持久化）"
+        
         # 获取或创建集合
         self.collection = self._get_or_create_collection(collection_name)
         
         print(f" ChromaDB向量存储初始化完成")
-        print(f"   存储路径: {self.persist_dir}")
+        print(f"   存储路径: {location}")
         print(f"   集合名称: {collection_name}")
         print(f"   嵌入维度: {self.embedder.dimensions}")
     
+    @classmethod
+    def from_client(cls, client, collection_name: str = "code_repository", **kwargs) -> "ChromaVectorStore":
+        """
+        在已有的ChromaDB客户端上创建向量存储
+        
+        Args:
+            client: ChromaDB客户端（PersistentClient 或 EphemeralClient）
+            collection_name: 集合名称
+            **kwargs: 其他初始化参数（如 embedder、hnsw_metadata）
+        """
+        return cls(collection_name, client=client, **kwargs)
+    
     def _get_or_create_collection(self, name: str):
         """获取或创建集合"""
         try:
             # 尝试获取现有集合
             collection = self.client.get_collection(name=name)
             print(f" 加载现有集合: {name}")
-            return collection
         except Exception:
-            # 创建新集合
+            # 创建新集合：存储的是L2归一化后的单位向量，内积即余弦相似度
             print(f" 创建新集合: {name}")
-            return self.client.create_collection(
+            collection = self.client.create_collection(
                 name=name,
-                metadata={"description": "智能代码仓库问答系统向量存储"},
+                metadata={
+                    "description": "智能代码仓库问答系统向量存储",
+                    "hnsw:space": "ip",
+                    "unit_vectors": True,
+                    **self.hnsw_metadata
+                },
                 embedding_function=None  # 我们使用自己的嵌入函数
             )
+        
+        # 记录距离度量，旧集合未指定时为ChromaDB默认的l2
+        self.space = (collection.metadata or {}).get("hnsw:space", "l2")
+        return collection
     
     def _generate_id(self, content: str, source: str) -> str:
         """
@@ -102,10 +152,14 @@ class ChromaVectorStore:
         Returns:
             唯一ID字符串
         """
-        # 使用内容哈希和源信息生成ID
-        content_hash = hashlib.md5(content.encode()).hexdigest()[:8]
-        source_hash = hashlib.md5(source.encode()).hexdigest()[:8]
-        return f"{content_hash}_{source_hash}"
+        # 来源哈希(64位) + 内容哈希(64位)，共128位，渲染为32位十六进制
+        if XXHASH_AVAILABLE:
+            source_hash = xxhash.xxh3_64_intdigest(source.encode())
+            content_hash = xxhash.xxh3_64_intdigest(content.encode())
+        else:
+            source_hash = int.from_bytes(hashlib.blake2b(source.encode(), digest_size=8).digest(), "big")
+            content_hash = int.from_bytes(hashlib.blake2b(content.encode(), digest_size=8).digest(), "big")
+        return f"{source_hash:016x}{content_hash:016x}"
     
     def add_documents(self, documents: List[Dict[str, Any]], batch_size: int = 100):
         """
@@ -116,59 +170,183 @@ class ChromaVectorStore:
                 - text: 文本内容
                 - metadata: 元数据（如文件路径、类型等）
             batch_size: 批量添加大小
+            
+        Returns:
+            统计字典：added（新增）、updated（仅更新元数据）、skipped（重复或已存在）
         """
         if not documents:
             print(" 没有文档可添加")
-            return
+            return {"added": 0, "updated": 0, "skipped": 0}
         
         print(f" 开始添加 {len(documents)} 个文档到向量存储...")
         
-        # 分批处理
-        for i in range(0, len(documents), batch_size):
-            batch = documents[i:i + batch_size]
-            batch_num = i // batch_size + 1
-            total_batches = (len(documents) + batch_size - 1) // batch_size
-            
-            print(f"   处理批次 {batch_num}/{total_batches} ({len(batch)} 个文档)")
-            
-            # 准备数据
-            texts = []
-            metadatas = []
-            ids = []
-            
-            for doc in batch:
-                text = doc.get("text", "").strip()
-                metadata = doc.get("metadata", {})
+        # 写入流水线：主线程计算第N+1批嵌入的同时，后台线程将第N批写入ChromaDB
+        # 队列容量为2，限制在途批次的内存占用
+        insert_queue = queue.Queue(maxsize=2)
+        insert_errors = []
+        writer = threading.Thread(
+            target=self._insert_worker,
+            args=(insert_queue, insert_errors),
+            daemon=True
+        )
+        writer.start()
+        
+        # 本次调用中已出现的ID（ID由来源和内容哈希生成，相同即为重复文档）
+        seen_ids = set()
+        skipped = 0
+        updated = 0
+        added = 0
+        empty = 0
+        
+        try:
+            # 分批处理
+            for i in range(0, len(documents), batch_size):
+                if insert_errors:
+                    break
                 
-                if not text:
-                    continue
+                batch = documents[i:i + batch_size]
+                batch_num = i // batch_size + 1
+                total_batches = (len(documents) + batch_size - 1) // batch_size
+                
+                print(f"   处理批次 {batch_num}/{total_batches} ({len(batch)} 个文档)")
                 
-                # 生成ID
-                source = metadata.get("source", "unknown")
-                doc_id = self._generate_id(text, source)
+                # 准备数据
+                texts = []
+                metadatas = []
+                ids = []
                 
-                # 添加时间戳
-                metadata["added_at"] = datetime.now().isoformat()
+                for doc in batch:
+                    text = doc.get("text", "").strip()
+                    metadata = self._normalize_metadata(doc.get("metadata", {}))
+                    
+                    if not text:
+                        empty += 1
+                        continue
+                    
+                    # 生成ID，同一次调用中的重复文档只处理一次
+                    source = metadata.get("source", "unknown")
+                    doc_id = self._generate_id(text, source)
+                    if doc_id in seen_ids:
+                        skipped += 1
+                        continue
+                    seen_ids.add(doc_id)
+                    
+                    # 添加时间戳
+                    metadata["added_at"] = datetime.now().isoformat()
+                    
+                    texts.append(text)
+                    metadatas.append(metadata)
+                    ids.append(doc_id)
                 
-                texts.append(text)
-                metadatas.append(metadata)
-                ids.append(doc_id)
+                if ids:
+                    # 集合中已存在的文档（ID相同即文本相同）不再重复计算嵌入；
+                    # 但state、comments_count等元数据不参与ID，变化时仍需写回
+                    existing = self.collection.get(ids=ids, include=["metadatas"])
+                    stored = dict(zip(existing["ids"], existing["metadatas"]))
+                    if stored:
+                        keep = []
+                        update_ids = []
+                        update_metadatas = []
+                        for j, doc_id in enumerate(ids):
+                            if doc_id not in stored:
+                                keep.append(j)
+                                continue
+                                
+                            old_metadata = stored[doc_id] or {}
+                            new_metadata = metadatas[j]
+                            if self._metadata_changed(old_metadata, new_metadata):
+                                # 保留首次添加的时间
+                                new_metadata["added_at"] = old_metadata.get("added_at", new_metadata["added_at"])
+                                update_ids.append(doc_id)
+                                update_metadatas.append(new_metadata)
+                            else:
+                                skipped += 1
+                        
+                        if update_ids:
+                            updated += len(update_ids)
+                            # 只更新元数据，交给写入线程以保持写入顺序
+                            insert_queue.put((batch_num, None, update_metadatas, update_ids, None))
+                        
+                        texts = [texts[j] for j in keep]
+                        metadatas = [metadatas[j] for j in keep]
+                        ids = [ids[j] for j in keep]
+                
+                if texts:
+                    # 获取L2归一化的嵌入向量（ChromaDB内部以float32存储，统一转换避免float64中间数组）
+                    embeddings = self.embedder.get_embeddings(texts, normalize=True).astype(np.float32, copy=False)
+                    
+                    # 交给写入线程添加到集合
+                    insert_queue.put((batch_num, texts, metadatas, ids, embeddings))
+                    added += len(ids)
+        finally:
+            # 结束标记，等待所有批次写入完成
+            insert_queue.put(None)
+            writer.join()
+        
+        if insert_errors:
+            raise insert_errors[0]
+        
+        if empty:
+            print(f"   跳过 {empty} 个空文档")
+        if skipped:
+            print(f"   跳过 {skipped} 个重复或已存在的文档")
+        if updated:
+            print(f"   更新 {updated} 个已存在文档的元数据")
+        print(f"  所有文档添加完成！共添加 {added} 个文档")
+        return {"added": added, "updated": updated, "skipped": skipped}
+    
+    @staticmethod
+    def _normalize_metadata(metadata: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        将元数据转换为ChromaDB实际存储的形式
+        
+        ChromaDB只保存str/int/float/bool且不保存None值，读回的元数据与原始字典不同；
+        写入前统一转换，与已存储元数据比较时才不会把相同的元数据误判为变化
+        """
+        normalized = {}
+        for key, value in metadata.items():
+            if value is None:
+                continue
+            if isinstance(value, np.generic):
+                value = value.item()
+            if not isinstance(value, (str, int, float, bool)):
+                value = str(value)
+            normalized[key] = value
+        return normalized
+    
+    @staticmethod
+    def _metadata_changed(old: Dict[str, Any], new: Dict[str, Any]) -> bool:
+        """比较已存储与新的元数据（忽略添加时间戳）"""
+        return ({k: v for k, v in old.items() if k != "added_at"} !=
+                {k: v for k, v in new.items() if k != "added_at"})
+    
+    def _insert_worker(self, insert_queue: "queue.Queue", insert_errors: List[Exception]):
+        """后台写入线程：从队列取出已编码的批次并写入集合（embeddings为None时只更新元数据）"""
+        while True:
+            item = insert_queue.get()
+            if item is None:
+                return
+            if insert_errors:
+                # 已有批次失败，继续取出剩余批次以免主线程阻塞
+                continue
             
-            if texts:
-                # 获取嵌入向量
-                embeddings = self.embedder.get_embeddings(texts)
+            batch_num, texts, metadatas, ids, embeddings = item
+            try:
+                if embeddings is None:
+                    self.collection.update(ids=ids, metadatas=metadatas)
+                    print(f"     批次 {batch_num} 元数据更新成功")
+                    continue
                 
-                # 添加到集合
-                self.collection.add(
+                # upsert保证幂等：并发写入同一集合时，已存在的ID不会导致添加失败
+                self.collection.upsert(
                     embeddings=embeddings.tolist(),
                     documents=texts,
                     metadatas=metadatas,
                     ids=ids
                 )
-                
                 print(f"     批次 {batch_num} 添加成功")
-        
-        print(f"  所有文档添加完成！共添加 {len(documents)} 个文档")
+            except Exception as e:
+                insert_errors.append(e)
     
     def search(self, query: str, n_results: int = 5, filter_metadata: Optional[Dict] = None) -> List[Dict[str, Any]]:
         """
@@ -182,42 +360,115 @@ class ChromaVectorStore:
         Returns:
             搜索结果列表
         """
+        results = self._query(query, n_results, filter_metadata)
+        return self._format_results(results, 0)
+    
+    def search_arrays(self, query: str, n_results: int = 5,
+                      filter_metadata: Optional[Dict] = None) -> Dict[str, Any]:
+        """
+        语义搜索，以数组形式返回结果（不逐条构造结果字典）
+        
+        适合对结果做向量化后处理，例如 results["ids"][results["scores"] >= 0.5]
+        
+        Args:
+            query: 查询文本
+            n_results: 返回结果数量
+            filter_metadata: 元数据过滤条件
+            
+        Returns:
+            字典，包含：
+                - ids: 文档ID数组
+                - distances: float32距离数组
+                - scores: float32相似度数组（0-1之间）
+                - documents: 文档内容列表
+                - metadatas: 元数据列表
+        """
+        results = self._query(query, n_results, filter_metadata)
+        distances = np.asarray(results["distances"][0] if results["distances"] else [], dtype=np.float32)
+        return {
+            "ids": np.asarray(results["ids"][0] if results["ids"] else []),
+            "distances": distances,
+            "scores": self._distances_to_scores(distances),
+            "documents": results["documents"][0] if results["documents"] else [],
+            "metadatas": results["metadatas"][0] if results["metadatas"] else []
+        }
+    
+    def _query(self, query: str, n_results: int, filter_metadata: Optional[Dict]) -> Dict[str, Any]:
+        """编码单个查询并检索集合，返回ChromaDB原始查询结果"""
         # 获取查询嵌入
-        query_embedding = self.embedder.get_embedding(query)
+        query_embedding = self.embedder.get_embedding(query, normalize=True).astype(np.float32, copy=False)
         
         # 执行搜索
-        results = self.collection.query(
+        return self.collection.query(
             query_embeddings=[query_embedding.tolist()],
             n_results=n_results,
             where=filter_metadata,
             include=["documents", "metadatas", "distances"]
         )
+    
+    def search_batch(self, queries: List[str], n_results: int = 5,
+                     filter_metadata: Optional[Dict] = None) -> List[List[Dict[str, Any]]]:
+        """
+        批量语义搜索：一次编码所有查询，一次查询集合
         
-        # 格式化结果
+        Args:
+            queries: 查询文本列表
+            n_results: 每个查询返回的结果数量
+            filter_metadata: 元数据过滤条件
+            
+        Returns:
+            与queries一一对应的搜索结果列表
+        """
+        if not queries:
+            return []
+        
+        # 批量获取查询嵌入
+        query_embeddings = self.embedder.get_embeddings(queries, normalize=True).astype(np.float32, copy=False)
+        
+        # 一次查询所有向量
+        results = self.collection.query(
+            query_embeddings=query_embeddings.tolist(),
+            n_results=n_results,
+            where=filter_metadata,
+            include=["documents", "metadatas", "distances"]
+        )
+        
+        return [self._format_results(results, i) for i in range(len(queries))]
+    
+    def _format_results(self, results: Dict[str, Any], index: int) -> List[Dict[str, Any]]:
+        """将第index个查询的原始结果格式化为结果字典列表"""
         formatted_results = []
-        if results["documents"] and results["documents"][0]:
-            for i in range(len(results["documents"][0])):
-                distance = results["distances"][0][i]
-                # 计算相似度，确保在0-1范围内
-                # ChromaDB返回的是距离（欧氏距离），需要转换为相似度
-                if isinstance(distance, (int, float)):
-                    # 欧氏距离转相似度：相似度 = 1 / (1 + 距离)
-                    score = 1.0 / (1.0 + float(distance))
-                    # 确保在0-1之间
-                    score = max(0.0, min(1.0, score))
-                else:
-                    score = 0.0
-                
-                result = {
-                    "document": results["documents"][0][i],
-                    "metadata": results["metadatas"][0][i],
-                    "distance": distance,
-                    "score": score  # 使用计算后的相似度
-                }
-                formatted_results.append(result)
+        if not results["documents"] or not results["documents"][index]:
+            return formatted_results
+        
+        documents = results["documents"][index]
+        metadatas = results["metadatas"][index]
+        distances = results["distances"][index]
+        # 整批换算相似度，再逐条组装结果字典
+        scores = self._distances_to_scores(np.asarray(distances, dtype=np.float64)).tolist()
+        for document, metadata, distance, score in zip(documents, metadatas, distances, scores):
+            result = {
+                "document": document,
+                "metadata": metadata,
+                "distance": distance,
+                "score": score  # 使用计算后的相似度
+            }
+            formatted_results.append(result)
         
         return formatted_results
     
+    def _distances_to_scores(self, distances: np.ndarray) -> np.ndarray:
+        """按集合的距离度量将ChromaDB返回的距离数组整批转换为0-1之间的相似度"""
+        if self.space in ("ip", "cosine"):
+            # 单位向量下 ip 距离 = 1 - 内积，cosine 距离 = 1 - 余弦，相似度 = 1 - 距离
+            scores = 1.0 - distances
+        else:
+            # 欧氏距离转相似度：相似度 = 1 / (1 + 距离)
+            scores = 1.0 / (1.0 + distances)
+        
+        # 确保在0-1之间
+        return np.clip(scores, 0.0, 1.0)
+    
     def get_collection_info(self) -> Dict[str, Any]:
         """获取集合信息"""
         count = self.collection.count()
@@ -5,85 +5,269 @@
 import os
 import sys
 import json
+import mmap
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 from datetime import datetime
 
-# 添加项目根目录到Python路径
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = Path(current_dir).parent.parent
-if str(project_root) not in sys.path:
-    sys.path.insert(0, str(project_root))
+# 项目根目录（数据目录和项目README的位置）
+project_root = Path(os.path.abspath(__file__)).parent.parent.parent
 
-print(f"🔧 项目根目录: {project_root}")
+# JSON编解码：优先使用orjson（直接处理bytes），不可用时回退到标准库
+try:
+    import orjson
 
-# 设置HuggingFace镜像源
-os.environ['HF_ENDPOINT'] = 'https://hf-mirror.com'
+    def _loads(data: bytes):
+        return orjson.loads(data)
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+except ImportError:
+    def _loads(data: bytes):
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        return json.loads(data)
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, ensure_ascii=False, indent=2).encode('utf-8')
+
+# 只需少量字段时使用simdjson惰性解析，避免为整条记录构建Python对象
+try:
+    import simdjson
+    SIMDJSON_AVAILABLE = True
+except ImportError:
+    SIMDJSON_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+# 加载器在线程池中并发运行，simdjson解析器不可跨线程共享
+_thread_local = threading.local()
+
+
+def _get_parser():
+    """获取当前线程专用的simdjson解析器"""
+    parser = getattr(_thread_local, "parser", None)
+    if parser is None:
+        parser = _thread_local.parser = simdjson.Parser()
+    return parser
+
+# 达到该大小的文件用mmap映射后直接解析，小文件直接读取（映射开销大于收益）
+_MMAP_THRESHOLD = 16 * 1024
+
+# 各加载器实际读取的字段
+_CODE_FIELDS = ("path", "content", "language", "name")
+_ISSUE_FIELDS = ("title", "body", "description", "html_url", "number", "state",
+                 "user", "created_at", "comments", "labels")
+_PR_FIELDS = ("title", "body", "description", "html_url", "number", "state",
+              "user", "created_at", "merged", "comments")
+_README_FIELDS = ("content", "description")
+
+
+def _materialize(value):
+    """将simdjson惰性代理转换为Python对象，基本类型原样返回"""
+    if isinstance(value, simdjson.Object):
+        return value.as_dict()
+    if isinstance(value, simdjson.Array):
+        return value.as_list()
+    return value
+
+
+def _parse_projected(data: bytes, fields: tuple):
+    """用simdjson解析JSON，每条记录只取出fields中存在的字段"""
+    doc = _get_parser().parse(data)
+    
+    def project(item):
+        if not isinstance(item, simdjson.Object):
+            return _materialize(item)
+        return {key: _materialize(item[key]) for key in fields if key in item}
+    
+    if isinstance(doc, simdjson.Array):
+        return [project(item) for item in doc]
+    if isinstance(doc, simdjson.Object):
+        return [project(doc)]
+    return doc
+
+
+def _parse_content(data, fields: Optional[tuple] = None):
+    """解析JSON字节内容，提供fields且simdjson可用时按字段惰性解析"""
+    if fields is not None and SIMDJSON_AVAILABLE:
+        return _parse_projected(bytes(data), fields)
+    return _loads(data)
+
+
+def _read_file(filepath: Path, size: int) -> bytes:
+    """按已知大小用os.read读取整个文件，绕过缓冲文件对象"""
+    fd = os.open(filepath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        data = os.read(fd, size)
+        if len(data) == size:
+            return data
+        
+        # 短读（如管道、网络文件系统）时继续读取，直到读满或到达文件末尾
+        chunks = [data]
+        remaining = size - len(data)
+        while remaining > 0:
+            chunk = os.read(fd, remaining)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b"".join(chunks)
+    finally:
+        os.close(fd)
+
+
+def _parse_mapped(filepath: Path, fields: Optional[tuple] = None):
+    """将文件只读映射到内存后直接解析，避免先整体读入再解析的大块拷贝"""
+    fd = os.open(filepath, os.O_RDONLY | getattr(os, 'O_BINARY', 0))
+    try:
+        with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mm:
+            try:
+                # 解析结果不引用缓冲区，视图需在关闭映射前释放
+                with memoryview(mm) as view:
+                    return _parse_content(view, fields)
+            except ValueError as e:
+                # 映射关闭前保留开头内容，供调用方输出预览
+                e.preview = mm[:100]
+                raise
+    finally:
+        os.close(fd)
+
+
+# 文件扩展名 -> 编程语言
+# 实测 rfind + dict.get 比按后缀元组逐个 str.endswith 匹配快约2倍，保留字典查找
+_LANGUAGE_MAP = {
+    '.py': 'python',
+    '.js': 'javascript',
+    '.java': 'java',
+    '.cpp': 'cpp',
+    '.c': 'c',
+    '.md': 'markdown',
+    '.html': 'html',
+    '.css': 'css',
+    '.json': 'json'
+}
 
 
 class DataIntegrator:
     """数据集成器"""
     
-    def __init__(self, collection_name: str = "smart_code_qa_system"):
-        """初始化数据集成器"""
+    def __init__(self, collection_name: str = "smart_code_qa_system", batch_size: int = 256,
+                 data_dir: Optional[Path] = None, hnsw_metadata: Dict[str, Any] = None,
+                 embedder=None, client=None):
+        """
+        初始化数据集成器
+        
+        Args:
+            collection_name: 集合名称
+            batch_size: 每批嵌入并写入的文档数，传给 DataIndexer
+            data_dir: 数据文件及集成信息的目录，默认为项目根目录下的 data
+            hnsw_metadata: 新建集合时的HNSW索引参数，见 ChromaVectorStore
+            embedder: 已初始化的嵌入模型，为None时由向量存储新建
+            client: 已创建的ChromaDB客户端，传入时与其他存储共用
+        """
         self.collection_name = collection_name
         
         try:
             from src.vector_store.indexer import DataIndexer
-            self.indexer = DataIndexer(collection_name)
-            print(f"✅ 数据索引器初始化成功")
+            self.indexer = DataIndexer(collection_name, batch_size=batch_size,
+                                       hnsw_metadata=hnsw_metadata,
+                                       embedder=embedder,
+                                       client=client)
+            logger.info("数据索引器初始化成功")
         except ImportError as e:
-            print(f"❌ 导入失败: {e}")
+            logger.error("导入失败: %s", e)
             sys.exit(1)
         
-        self.data_dir = project_root / "data"
+        self.data_dir = Path(data_dir) if data_dir is not None else project_root / "data"
         
-        print(f"🔧 初始化数据集成器")
-        print(f"   集合名称: {collection_name}")
-        print(f"   数据目录: {self.data_dir}")
+        # 各加载器的候选数据文件（只构建一次）
+        self._project_readme = project_root / "README.md"
+        self._candidate_code_files = tuple(self.data_dir / name for name in (
+            "demo2_code.json", "code_files.json", "demo_code_data.json"))
+        self._candidate_issue_files = tuple(self.data_dir / name for name in (
+            "demo3_issues.json", "issues.json"))
+        self._candidate_pr_files = tuple(self.data_dir / name for name in (
+            "demo3_prs.json", "prs.json"))
+        self._candidate_readme_files = tuple(self.data_dir / name for name in (
+            "readme.json", "repo_info.json"))
+        
+        logger.info("初始化数据集成器")
+        logger.info("集合名称: %s", collection_name)
+        logger.info("数据目录: %s", self.data_dir)
         
         # 确保数据目录存在
         self.data_dir.mkdir(exist_ok=True)
     
-    def load_json_file(self, filepath: Path, default_data: List = None) -> List:
-        """安全加载JSON文件"""
+    def load_json_file(self, filepath: Path, default_data: List = None,
+                       fields: Optional[tuple] = None) -> List:
+        """
+        安全加载JSON文件
+        
+        Args:
+            filepath: 文件路径
+            default_data: 加载失败时返回的默认数据
+            fields: 只需要的字段；提供且simdjson可用时按字段惰性解析
+        """
         if default_data is None:
             default_data = []
         
-        if not filepath.exists():
+        # 一次stat同时完成存在性检查和大小获取
+        try:
+            size = filepath.stat().st_size
+        except FileNotFoundError:
             return default_data
         
+        return self._load_json(filepath, size, default_data, fields)
+    
+    def _load_candidate(self, filepath: Path, fields: tuple,
+                        kind: str = "文件") -> Optional[List]:
+        """加载候选数据文件，文件不存在时返回None"""
+        try:
+            size = filepath.stat().st_size
+        except FileNotFoundError:
+            return None
+        
+        logger.info("发现%s: %s", kind, filepath.name)
+        return self._load_json(filepath, size, [], fields)
+    
+    def _load_json(self, filepath: Path, size: int, default_data: List,
+                   fields: Optional[tuple]) -> List:
+        """按文件大小选择mmap或直接读取并解析JSON"""
+        content = None
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read().strip()
+            if size >= _MMAP_THRESHOLD:
+                data = _parse_mapped(filepath, fields)
+            else:
+                content = _read_file(filepath, size).strip()
                 if not content:
-                    print(f"   ⚠ 文件为空: {filepath.name}")
-                    return default_data
-                
-                data = json.loads(content)
-                
-                # 确保返回的是列表
-                if isinstance(data, list):
-                    return data
-                elif isinstance(data, dict):
-                    # 如果是字典，转换为列表
-                    return [data]
-                else:
-                    print(f"   ⚠ 文件格式不是列表或字典: {filepath.name}")
+                    logger.warning("文件为空: %s", filepath.name)
                     return default_data
+                data = _parse_content(content, fields)
+            
+            # 确保返回的是列表
+            if isinstance(data, list):
+                return data
+            elif isinstance(data, dict):
+                # 如果是字典，转换为列表
+                return [data]
+            else:
+                logger.warning("文件格式不是列表或字典: %s", filepath.name)
+                return default_data
                     
-        except json.JSONDecodeError as e:
-            print(f"   ❌ JSON解析失败: {filepath.name} - {e}")
-            # 尝试读取原始内容查看问题
-            try:
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    raw_content = f.read()
-                    print(f"   原始内容前100字符: {raw_content[:100]}")
-            except:
-                pass
+        except ValueError as e:  # json/orjson/simdjson的解析错误均为ValueError
+            logger.error("JSON解析失败: %s - %s", filepath.name, e)
+            # 使用已读取的内容预览问题，无需再次打开文件
+            preview = getattr(e, 'preview', content)
+            if preview is not None and logger.isEnabledFor(logging.DEBUG):
+                logger.debug("原始内容前100字符: %r",
+                             preview[:100].decode('utf-8', errors='replace'))
             return default_data
         except Exception as e:
-            print(f"   ❌ 读取文件失败: {filepath.name} - {e}")
+            logger.error("读取文件失败: %s - %s", filepath.name, e)
             return default_data
     
     def load_day2_code_data(self, repo_name: str = "smart-code-qa") -> List[Dict[str, Any]]:
@@ -96,44 +280,36 @@ class DataIntegrator:
         Returns:
             代码数据列表
         """
-        print(f"\n📁 加载Day 2代码数据...")
-        
-        # 检查常见的数据文件
-        data_files = [
-            self.data_dir / "demo2_code.json",
-            self.data_dir / "code_files.json",
-            self.data_dir / "demo_code_data.json",
-        ]
+        logger.info("加载Day 2代码数据...")
         
         all_code_files = []
         
-        for filepath in data_files:
-            if filepath.exists():
-                print(f"   发现文件: {filepath.name}")
-                data = self.load_json_file(filepath)
+        # 检查常见的数据文件
+        for filepath in self._candidate_code_files:
+            data = self._load_candidate(filepath, _CODE_FIELDS)
+            
+            if data:
+                logger.info("读取到 %s 条记录", len(data))
                 
-                if data:
-                    print(f"   读取到 {len(data)} 条记录")
-                    
-                    # 转换数据格式
-                    for i, item in enumerate(data):
-                        if isinstance(item, dict):
-                            # 创建标准化的代码文件数据
-                            code_file = {
-                                "path": item.get("path", f"file_{i}.py"),
-                                "content": item.get("content", "# 示例代码"),
-                                "language": item.get("language", self._detect_language(item.get("path", ""))),
-                                "name": item.get("name", Path(item.get("path", "")).name),
-                                "repo_name": repo_name,
-                                "size": len(item.get("content", ""))
-                            }
-                            all_code_files.append(code_file)
+                # 转换数据格式
+                for i, item in enumerate(data):
+                    if isinstance(item, dict):
+                        # 创建标准化的代码文件数据
+                        code_file = {
+                            "path": item.get("path", f"file_{i}.py"),
+                            "content": item.get("content", "# 示例代码"),
+                            "language": item.get("language", self._detect_language(item.get("path", ""))),
+                            "name": item.get("name", Path(item.get("path", "")).name),
+                            "repo_name": repo_name,
+                            "size": len(item.get("content", ""))
+                        }
+                        all_code_files.append(code_file)
         
         if not all_code_files:
-            print("   ⚠ 未找到代码数据文件，创建示例数据...")
+            logger.warning("未找到代码数据文件，创建示例数据...")
             all_code_files = self._create_sample_code_data(repo_name)
         
-        print(f"   ✅ 总共加载 {len(all_code_files)} 个代码文件")
+        logger.info("总共加载 %s 个代码文件", len(all_code_files))
         return all_code_files
     
     def load_day3_issue_data(self, repo_name: str = "smart-code-qa") -> List[Dict[str, Any]]:
@@ -146,59 +322,53 @@ class DataIntegrator:
         Returns:
             Issue数据列表
         """
-        print(f"\n📝 加载Day 3 Issue数据...")
-        
-        data_files = [
-            self.data_dir / "demo3_issues.json",
-            self.data_dir / "issues.json",
-        ]
+        logger.info("加载Day 3 Issue数据...")
         
         all_issues = []
         
-        for filepath in data_files:
-            if filepath.exists():
-                print(f"   发现文件: {filepath.name}")
-                data = self.load_json_file(filepath)
+        # 检查常见的数据文件
+        for filepath in self._candidate_issue_files:
+            data = self._load_candidate(filepath, _ISSUE_FIELDS)
+            
+            if data:
+                logger.info("读取到 %s 条记录", len(data))
                 
-                if data:
-                    print(f"   读取到 {len(data)} 条记录")
-                    
-                    for i, item in enumerate(data):
-                        if isinstance(item, dict):
-                            # 创建标准化的Issue数据
-                            # 处理user字段
-                            user_data = item.get("user", {})
-                            if isinstance(user_data, str):
-                                user_data = {"login": user_data}
-                            elif not isinstance(user_data, dict):
-                                user_data = {"login": "unknown"}
-                            
-                            # 处理labels字段
-                            labels = item.get("labels", [])
-                            if isinstance(labels, str):
-                                labels = [{"name": label.strip()} for label in labels.split(",") if label.strip()]
-                            elif not isinstance(labels, list):
-                                labels = []
-                            
-                            issue = {
-                                "title": item.get("title", f"Issue {i}"),
-                                "body": item.get("body", item.get("description", "问题描述")),
-                                "html_url": item.get("html_url", f"https://github.com/{repo_name}/issues/{i}"),
-                                "number": item.get("number", i),
-                                "state": item.get("state", "open"),
-                                "user": user_data,
-                                "repo_name": repo_name,
-                                "created_at": item.get("created_at", "2024-01-01T00:00:00Z"),
-                                "comments": item.get("comments", 0),
-                                "labels": labels
-                            }
-                            all_issues.append(issue)
+                for i, item in enumerate(data):
+                    if isinstance(item, dict):
+                        # 创建标准化的Issue数据
+                        # 处理user字段
+                        user_data = item.get("user", {})
+                        if isinstance(user_data, str):
+                            user_data = {"login": user_data}
+                        elif not isinstance(user_data, dict):
+                            user_data = {"login": "unknown"}
+                        
+                        # 处理labels字段
+                        labels = item.get("labels", [])
+                        if isinstance(labels, str):
+                            labels = [{"name": label.strip()} for label in labels.split(",") if label.strip()]
+                        elif not isinstance(labels, list):
+                            labels = []
+                        
+                        issue = {
+                            "title": item.get("title", f"Issue {i}"),
+                            "body": item.get("body", item.get("description", "问题描述")),
+                            "html_url": item.get("html_url", f"https://github.com/{repo_name}/issues/{i}"),
+                            "number": item.get("number", i),
+                            "state": item.get("state", "open"),
+                            "user": user_data,
+                            "repo_name": repo_name,
+                            "created_at": item.get("created_at", "2024-01-01T00:00:00Z"),
+                            "comments": item.get("comments", 0),
+                            "labels": labels
+                        }
+                        all_issues.append(issue)
         
         if not all_issues:
-            print("   ⚠ 未找到Issue数据文件，创建示例数据...")
+            logger.warning("未找到Issue数据文件，创建示例数据...")
             all_issues = self._create_sample_issue_data(repo_name)
         
-        print(f"   ✅ 总共加载 {len(all_issues)} 个Issue")
+        logger.info("总共加载 %s 个Issue", len(all_issues))
         return all_issues
     
     def load_day3_pr_data(self, repo_name: str = "smart-code-qa") -> List[Dict[str, Any]]:
@@ -211,142 +381,130 @@ class DataIntegrator:
         Returns:
             PR数据列表
         """
-        print(f"\n🔀 加载Day 3 PR数据...")
-        
-        data_files = [
-            self.data_dir / "demo3_prs.json",
-            self.data_dir / "prs.json",
-        ]
+        logger.info("加载Day 3 PR数据...")
         
         all_prs = []
         
-        for filepath in data_files:
-            if filepath.exists():
-                print(f"   发现文件: {filepath.name}")
-                data = self.load_json_file(filepath)
+        # 检查常见的数据文件
+        for filepath in self._candidate_pr_files:
+            data = self._load_candidate(filepath, _PR_FIELDS)
+            
+            if data:
+                logger.info("读取到 %s 条记录", len(data))
                 
-                if data:
-                    print(f"   读取到 {len(data)} 条记录")
-                    
-                    for i, item in enumerate(data):
-                        if isinstance(item, dict):
-                            # 创建标准化的PR数据
-                            # 处理user字段
-                            user_data = item.get("user", {})
-                            if isinstance(user_data, str):
-                                user_data = {"login": user_data}
-                            elif not isinstance(user_data, dict):
-                                user_data = {"login": "unknown"}
-                            
-                            # 处理merged字段
-                            merged = item.get("merged", False)
-                            if isinstance(merged, str):
-                                merged = merged.lower() in ["true", "yes", "1"]
-                            
-                            pr = {
-                                "title": item.get("title", f"PR {i}"),
-                                "body": item.get("body", item.get("description", "PR描述")),
-                                "html_url": item.get("html_url", f"https://github.com/{repo_name}/pull/{i}"),
-                                "number": item.get("number", i),
-                                "state": item.get("state", "open"),
-                                "user": user_data,
-                                "repo_name": repo_name,
-                                "created_at": item.get("created_at", "2024-01-01T00:00:00Z"),
-                                "merged": merged,
-                                "comments": item.get("comments", 0)
-                            }
-                            all_prs.append(pr)
+                for i, item in enumerate(data):
+                    if isinstance(item, dict):
+                        # 创建标准化的PR数据
+                        # 处理user字段
+                        user_data = item.get("user", {})
+                        if isinstance(user_data, str):
+                            user_data = {"login": user_data}
+                        elif not isinstance(user_data, dict):
+                            user_data = {"login": "unknown"}
+                        
+                        # 处理merged字段
+                        merged = item.get("merged", False)
+                        if isinstance(merged, str):
+                            merged = merged.lower() in ["true", "yes", "1"]
+                        
+                        pr = {
+                            "title": item.get("title", f"PR {i}"),
+                            "body": item.get("body", item.get("description", "PR描述")),
+                            "html_url": item.get("html_url", f"https://github.com/{repo_name}/pull/{i}"),
+                            "number": item.get("number", i),
+                            "state": item.get("state", "open"),
+                            "user": user_data,
+                            "repo_name": repo_name,
+                            "created_at": item.get("created_at", "2024-01-01T00:00:00Z"),
+                            "merged": merged,
+                            "comments": item.get("comments", 0)
+                        }
+                        all_prs.append(pr)
         
         if not all_prs:
-            print("   ⚠ 未找到PR数据文件，创建示例数据...")
+            logger.warning("未找到PR数据文件，创建示例数据...")
             all_prs = self._create_sample_pr_data(repo_name)
         
-        print(f"   ✅ 总共加载 {len(all_prs)} 个PR")
+        logger.info("总共加载 %s 个PR", len(all_prs))
         return all_prs
     
-    def load_readme_data(self, repo_name: str = "smart-code-qa") -> List[Dict[str, Any]]:
+    def load_readme_data(self, repo_name: str = "smart-code-qa",
+                         truncate_chars: Optional[int] = None) -> List[Dict[str, Any]]:
         """
         加载README数据
         
         Args:
             repo_name: 仓库名称
+            truncate_chars: 每个README最多保留的字符数，None表示保留全文
             
         Returns:
             README数据列表
         """
-        print(f"\n📖 加载README数据...")
+        logger.info("加载README数据...")
         
         readmes = []
         
-        # 1. 首先尝试加载项目README.md
-        readme_path = project_root / "README.md"
-        if readme_path.exists():
-            print(f"   发现项目README.md文件")
-            try:
-                with open(readme_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    readmes.append({
-                        "path": "README.md",
-                        "content": content,
-                        "repo_name": repo_name
-                    })
-                print(f"   成功读取项目README.md")
-            except Exception as e:
-                print(f"   读取README.md失败: {e}")
+        # 1. 首先尝试加载项目README.md（直接打开，不存在时跳过）
+        try:
+            with open(self._project_readme, 'rb') as f:
+                logger.info("发现项目README.md文件")
+                if truncate_chars is None:
+                    raw = f.read()
+                else:
+                    # UTF-8每个字符最多4字节，只读取截断所需的前缀
+                    raw = f.read(truncate_chars * 4)
+                # 二进制读取不做换行转换，按文本模式（newline=None）的语义统一为\n
+                content = raw.decode('utf-8', errors='ignore')
+                content = content.replace('\r\n', '\n').replace('\r', '\n')[:truncate_chars]
+                readmes.append({
+                    "path": "README.md",
+                    "content": content,
+                    "repo_name": repo_name
+                })
+            logger.info("成功读取项目README.md")
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning("读取README.md失败: %s", e)
         
         # 2. 尝试加载数据目录中的README文件
-        readme_files = [
-            self.data_dir / "readme.json",
-            self.data_dir / "repo_info.json"
-        ]
-        
-        for filepath in readme_files:
-            if filepath.exists():
-                print(f"   发现README数据文件: {filepath.name}")
-                data = self.load_json_file(filepath)
-                
-                if data:
-                    for item in data:
-                        if isinstance(item, dict):
-                            content = item.get("content", item.get("description", ""))
-                            if content:
-                                readmes.append({
-                                    "path": "README.md",
-                                    "content": content,
-                                    "repo_name": repo_name
-                                })
+        for filepath in self._candidate_readme_files:
+            data = self._load_candidate(filepath, _README_FIELDS, kind="README数据文件")
+            
+            if data:
+                for item in data:
+                    if isinstance(item, dict):
+                        content = item.get("content", item.get("description", ""))
+                        if content:
+                            readmes.append({
+                                "path": "README.md",
+                                "content": content[:truncate_chars],
+                                "repo_name": repo_name
+                            })
         
         if not readmes:
-            print("   ⚠ 未找到README数据，创建示例数据...")
+            logger.warning("未找到README数据，创建示例数据...")
             readmes = self._create_sample_readme_data(repo_name)
         
-        print(f"   ✅ 总共加载 {len(readmes)} 个README")
+        logger.info("总共加载 %s 个README", len(readmes))
         return readmes
     
-    def _detect_language(self, filepath: str) -> str:
+    @staticmethod
+    def _detect_language(filepath: str) -> str:
         """根据文件扩展名检测编程语言"""
         if not filepath:
             return "unknown"
         
-        ext = Path(filepath).suffix.lower()
-        
-        language_map = {
-            '.py': 'python',
-            '.js': 'javascript',
-            '.java': 'java',
-            '.cpp': 'cpp',
-            '.c': 'c',
-            '.md': 'markdown',
-            '.html': 'html',
-            '.css': 'css',
-            '.json': 'json'
-        }
+        # 直接在字符串上取扩展名，无需构造Path对象
+        i = filepath.rfind('.')
+        if i < 0:
+            return "unknown"
         
-        return language_map.get(ext, 'unknown')
+        return _LANGUAGE_MAP.get(filepath[i:].lower(), 'unknown')
     
     def _create_sample_code_data(self, repo_name: str) -> List[Dict[str, Any]]:
         """创建示例代码数据"""
-        print("   创建示例代码数据...")
+        logger.info("创建示例代码数据...")
         
         return [
             {
@@ -361,7 +519,7 @@ class DataIntegrator:
     
     def _create_sample_issue_data(self, repo_name: str) -> List[Dict[str, Any]]:
         """创建示例Issue数据"""
-        print("   创建示例Issue数据...")
+        logger.info("创建示例Issue数据...")
         
         return [
             {
@@ -380,7 +538,7 @@ class DataIntegrator:
     
     def _create_sample_pr_data(self, repo_name: str) -> List[Dict[str, Any]]:
         """创建示例PR数据"""
-        print("   创建示例PR数据...")
+        logger.info("创建示例PR数据...")
         
         return [
             {
@@ -399,7 +557,7 @@ class DataIntegrator:
     
     def _create_sample_readme_data(self, repo_name: str) -> List[Dict[str, Any]]:
         """创建示例README数据"""
-        print("   创建示例README数据...")
+        logger.info("创建示例README数据...")
         
         return [
             {
@@ -411,88 +569,69 @@ class DataIntegrator:
     
     def integrate_all_data(self, repo_name: str = "smart-code-qa"):
         """集成所有数据"""
-        print("\n" + "=" * 60)
-        print("🚀 开始集成所有数据")
-        print("=" * 60)
+        logger.info("开始集成所有数据")
         
         try:
             # 1. 加载数据
-            print("\n📥 加载数据...")
+            logger.info("加载数据...")
             
-            code_files = self.load_day2_code_data(repo_name)
-            issues = self.load_day3_issue_data(repo_name)
-            prs = self.load_day3_pr_data(repo_name)
-            readmes = self.load_readme_data(repo_name)
+            # 四个加载器读取互不相关的文件，并发执行
+            with ThreadPoolExecutor(max_workers=4) as executor:
+                code_future = executor.submit(self.load_day2_code_data, repo_name)
+                issues_future = executor.submit(self.load_day3_issue_data, repo_name)
+                prs_future = executor.submit(self.load_day3_pr_data, repo_name)
+                # README只索引前500个字符，读取时即截断
+                readmes_future = executor.submit(self.load_readme_data, repo_name, truncate_chars=500)
+                
+                code_files = code_future.result()
+                issues = issues_future.result()
+                prs = prs_future.result()
+                readmes = readmes_future.result()
             
-            print(f"\n📊 数据统计:")
-            print(f"   代码文件: {len(code_files)} 个")
-            print(f"   Issues: {len(issues)} 个")
-            print(f"   Pull Requests: {len(prs)} 个")
-            print(f"   README文件: {len(readmes)} 个")
+            logger.info("数据统计:")
+            logger.info("代码文件: %s 个", len(code_files))
+            logger.info("Issues: %s 个", len(issues))
+            logger.info("Pull Requests: %s 个", len(prs))
+            logger.info("README文件: %s 个", len(readmes))
             total = len(code_files) + len(issues) + len(prs) + len(readmes)
-            print(f"   总计: {total} 个文档")
+            logger.info("总计: %s 个文档", total)
             
             # 2. 索引数据
-            print("\n📤 索引数据到向量存储...")
-            
-            # 索引代码文件
-            if code_files:
-                print("   索引代码文件...")
-                self.indexer.index_code_files(code_files)
-                print("   ✅ 代码文件索引完成")
-            
-            # 索引Issues
-            if issues:
-                print("   索引Issues...")
-                self.indexer.index_issues(issues)
-                print("   ✅ Issues索引完成")
-            
-            # 索引PRs
-            if prs:
-                print("   索引Pull Requests...")
-                self.indexer.index_pull_requests(prs)
-                print("   ✅ Pull Requests索引完成")
+            logger.info("索引数据到向量存储...")
             
-            # 索引README
-            if readmes:
-                print("   索引README文件...")
-                # 使用临时方法添加README
-                for readme in readmes:
-                    doc = {
-                        "text": f"README文件: {readme.get('path', 'README.md')}\n内容:\n{readme.get('content', '')[:500]}",
-                        "metadata": {
-                            "type": "readme",
-                            "source": readme.get('path', 'README.md'),
-                            "repository": repo_name,
-                            "file_name": "README.md"
-                        }
-                    }
-                    # 直接使用向量存储
-                    self.indexer.vector_store.add_documents([doc])
-                print("   ✅ README文件索引完成")
+            # 由索引器统一转换各类数据（包括README），合并为一次add_documents调用：
+            # 向量存储内部按批次流水线执行（编码下一批的同时写入上一批），
+            # 合并后流水线可以跨越数据类型，不会在每类数据结束时排空
+            self.indexer.index_all(
+                code_files_data=code_files,
+                issues_data=issues,
+                prs_data=prs,
+                readme_data=readmes
+            )
+            logger.info("索引完成: %s 个文档", total)
             
             # 3. 验证集成
-            print("\n🔍 验证数据集成...")
+            logger.info("验证数据集成...")
             vector_store = self.indexer.get_vector_store()
             info = vector_store.get_collection_info()
             
-            print(f"\n✅ 数据集成完成！")
-            print(f"   集合名称: {info['collection_name']}")
-            print(f"   总文档数: {info['document_count']}")
+            logger.info("数据集成完成！")
+            logger.info("集合名称: %s", info['collection_name'])
+            logger.info("总文档数: %s", info['document_count'])
             
             # 4. 简单搜索测试
-            print("\n🧪 简单搜索测试...")
+            logger.info("简单搜索测试...")
             test_queries = ["代码", "Issue", "PR", "README"]
             
             for query in test_queries:
                 results = vector_store.search(query, n_results=1)
                 if results:
-                    print(f"   搜索 '{query}': 找到 {len(results)} 个结果")
+                    logger.info("搜索 '%s': 找到 %s 个结果", query, len(results))
                 else:
-                    print(f"   搜索 '{query}': 无结果")
+                    logger.info("搜索 '%s': 无结果", query)
             
             # 5. 保存集成信息
-            print("\n💾 保存集成信息...")
+            logger.info("保存集成信息...")
             integration_info = {
                 "collection_name": self.collection_name,
                 "repo_name": repo_name,
@@ -505,26 +644,35 @@ class DataIntegrator:
             }
             
             info_file = self.data_dir / f"integration_{repo_name.replace('/', '_')}.json"
-            with open(info_file, 'w', encoding='utf-8') as f:
-                json.dump(integration_info, f, ensure_ascii=False, indent=2)
+            with open(info_file, 'wb') as f:
+                f.write(_dumps(integration_info))
             
-            print(f"✅ 集成信息已保存到: {info_file}")
+            logger.info("集成信息已保存到: %s", info_file)
             
-            print("\n" + "=" * 60)
-            print("🎉 数据集成完成！")
-            print("=" * 60)
+            logger.info("数据集成完成！")
             
             return integration_info
             
         except Exception as e:
-            print(f"\n❌ 数据集成过程中出错: {e}")
-            import traceback
-            traceback.print_exc()
+            logger.exception("数据集成过程中出错: %s", e)
             raise
 
 
+def _ensure_project_on_path():
+    """作为脚本运行时，将项目根目录加入Python路径以便导入src包"""
+    if str(project_root) not in sys.path:
+        sys.path.insert(0, str(project_root))
+
+
 def main():
     """主函数"""
+    _ensure_project_on_path()
+    
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
     print("🤖 数据集成器 - 修复版")
     print("=" * 60)
     
@@ -3,32 +3,395 @@
 使用 sentence-transformers 库，支持离线模式和镜像源
 """
 import os
-import sys
+import hashlib
+import functools
+import platform
+import importlib.util
+from collections import OrderedDict
 from typing import List, Union
 import numpy as np
 
-# ============ 关键设置：强制使用镜像源 ============
-# 必须在导入任何 huggingface 相关模块之前设置
-os.environ['HF_ENDPOINT'] = 'https://hf-mirror.com'
+# sentence-transformers 只检查是否安装，真正导入推迟到创建模型时，
+# 避免仅导入本模块就加载 torch/transformers
+SENTENCE_TRANSFORMERS_AVAILABLE = importlib.util.find_spec("sentence_transformers") is not None
 
-# 添加当前目录到路径，确保可以导入其他模块
-current_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(os.path.dirname(current_dir))
-if project_root not in sys.path:
-    sys.path.insert(0, project_root)
+# 编码器每次前向的批大小（批内只填充到该批最长序列）
+_ENCODE_BATCH_SIZE = 64
 
 try:
-    from sentence_transformers import SentenceTransformer
-    SENTENCE_TRANSFORMERS_AVAILABLE = True
+    import xxhash
+    XXHASH_AVAILABLE = True
+except ImportError:
+    XXHASH_AVAILABLE = False
+
+try:
+    import simsimd
+    SIMSIMD_AVAILABLE = True
 except ImportError:
-    SENTENCE_TRANSFORMERS_AVAILABLE = False
-    print("  sentence-transformers 不可用，将使用离线模式")
+    SIMSIMD_AVAILABLE = False
+
+# numba 同样只检查是否安装：导入约需150-230ms，而内核只在回退模型中使用，
+# 首次调用 hash_embeddings 时才导入并编译（见 embedding_numba）
+NUMBA_AVAILABLE = importlib.util.find_spec("numba") is not None
+
+# xorshift64* 的输出乘数，以及把53位整数映射到 [-1, 1) 的比例
+_XORSHIFT_MULT = np.uint64(0x2545F4914F6CDD1D)
+_UNIT_SCALE = 2.0 / 9007199254740992.0  # 2 / 2**53
+
+
+def _seed(text: str) -> int:
+    """由文本生成确定性的64位随机种子（非加密哈希即可）"""
+    if XXHASH_AVAILABLE:
+        return xxhash.xxh64_intdigest(text.encode('utf-8'))
+    # 直接将摘要字节转换为整数，省去十六进制编码再解析的往返
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def _initial_states(seeds: np.ndarray) -> np.ndarray:
+    """用 splitmix64 打散种子作为 xorshift 的初始状态（状态不能为0）"""
+    with np.errstate(over='ignore'):
+        z = seeds + np.uint64(0x9E3779B97F4A7C15)
+        z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        z = z ^ (z >> np.uint64(31))
+    return np.where(z == 0, np.uint64(0x9E3779B97F4A7C15), z)
+
+
+def _fill_numpy(states: np.ndarray, dim: int) -> np.ndarray:
+    """NumPy实现：所有行同时推进 xorshift64*，逐维填充后按行去均值并归一化"""
+    states = states.copy()
+    out = np.empty((len(states), dim), dtype=np.float64)
+    with np.errstate(over='ignore'):
+        for j in range(dim):
+            states ^= states >> np.uint64(12)
+            states ^= states << np.uint64(25)
+            states ^= states >> np.uint64(27)
+            out[:, j] = (states * _XORSHIFT_MULT) >> np.uint64(11)
+    out *= _UNIT_SCALE
+    out -= 1.0
+    out -= out.mean(axis=1, keepdims=True)
+    norms = np.sqrt(np.einsum('ij,ij->i', out, out))[:, None]
+    out /= np.where(norms > 0, norms, 1.0)
+    return out.astype(np.float32)
+
+
+@functools.lru_cache(maxsize=1)
+def _numba_fill():
+    """首次使用时导入Numba内核；numba不可用或导入失败（如与NumPy版本不兼容）时返回None"""
+    if not NUMBA_AVAILABLE:
+        return None
+    try:
+        try:
+            from .embedding_numba import fill_numba
+        except ImportError:
+            # 如果相对导入失败，尝试绝对导入
+            from src.vector_store.embedding_numba import fill_numba
+    except Exception as e:
+        print(f"  Numba内核不可用，改用NumPy实现: {e}")
+        return None
+    return fill_numba
+
+
+def hash_embeddings(texts: List[str], dim: int) -> np.ndarray:
+    """
+    由文本哈希生成确定性的伪随机单位向量（离线回退模型使用）
+    
+    Args:
+        texts: 输入文本列表
+        dim: 向量维度
+        
+    Returns:
+        (N, dim) 的float32矩阵，每行L2归一化
+    """
+    seeds = np.fromiter((_seed(text) for text in texts), dtype=np.uint64, count=len(texts))
+    states = _initial_states(seeds)
+    fill_numba = _numba_fill()
+    if fill_numba is not None:
+        return fill_numba(states, dim)
+    return _fill_numpy(states, dim)
+
+
+def quantize_int8(embeddings: np.ndarray) -> np.ndarray:
+    """
+    按行对称量化为int8：每个向量缩放到 [-127, 127]
+    
+    Args:
+        embeddings: (N, D) 浮点向量矩阵
+        
+    Returns:
+        (N, D) int8 矩阵
+    """
+    max_abs = np.abs(embeddings).max(axis=1, keepdims=True)
+    scales = 127.0 / np.where(max_abs > 0, max_abs, 1.0)
+    return np.clip(np.rint(embeddings * scales), -127, 127).astype(np.int8)
+
+
+def cosine_similarities(query_embedding: np.ndarray, embeddings: np.ndarray,
+                        int8: bool = False, normalized: bool = False) -> np.ndarray:
+    """
+    一次性计算查询向量与一组向量的余弦相似度（整批矩阵运算，不逐条循环）
+    
+    Args:
+        query_embedding: (D,) 查询向量
+        embeddings: (N, D) 候选向量矩阵，可直接传入已算好的嵌入，无需重新编码
+        int8: 是否先将向量量化为int8再计算余弦（需要SimSIMD，带宽减少4倍，
+              精度略有损失；SimSIMD不可用时忽略）
+        normalized: 输入是否已L2归一化，是则点积即余弦相似度，跳过求范数
+        
+    Returns:
+        (N,) 相似度数组
+    """
+    # 保证为连续的float32矩阵，matmul会直接调用BLAS的sgemv
+    # （einsum在未开启optimize时使用自身循环而不走BLAS，因此不采用）
+    query = np.ascontiguousarray(query_embedding, dtype=np.float32).reshape(1, -1)
+    matrix = np.ascontiguousarray(embeddings, dtype=np.float32)
+    if len(matrix) == 0:
+        return np.empty(0, dtype=np.float32)
+    
+    if SIMSIMD_AVAILABLE and int8:
+        # 余弦对每个向量的缩放不敏感，量化比例无需参与计算
+        distances = np.asarray(simsimd.cdist(quantize_int8(query), quantize_int8(matrix), metric="cosine"))
+        return 1.0 - distances[0]
+    
+    if SIMSIMD_AVAILABLE:
+        # SimSIMD一次调用完成整批余弦距离（按CPU指令集分派SIMD内核）
+        distances = np.asarray(simsimd.cdist(query, matrix, metric="cosine"))
+        return 1.0 - distances[0]
+    
+    similarities = matrix @ query[0]
+    if normalized:
+        # 归一化向量的点积即余弦相似度
+        return similarities
+    
+    # 零向量的相似度为0
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    return similarities / np.where(norms > 0, norms, 1.0)
+
+
+# NumPy运行时CPU特性名 -> /proc/cpuinfo 中的标志名
+_NUMPY_CPU_FEATURES = {
+    "AVX512VNNI": "avx512_vnni",
+    "AVX512F": "avx512f",
+    "AVX2": "avx2",
+    "AVX512BF16": "avx512_bf16",
+}
+
+
+def _numpy_cpu_flags() -> set:
+    """用NumPy运行时检测到的CPU特性作为跨平台回退（macOS/Windows没有 /proc/cpuinfo）"""
+    try:
+        try:
+            from numpy._core._multiarray_umath import __cpu_features__
+        except ImportError:
+            # NumPy 1.x
+            from numpy.core._multiarray_umath import __cpu_features__
+    except ImportError:
+        return set()
+    return {flag for name, flag in _NUMPY_CPU_FEATURES.items() if __cpu_features__.get(name)}
+
+
+@functools.lru_cache(maxsize=1)
+def _cpu_flags() -> frozenset:
+    """
+    CPU特性标志：优先读取 /proc/cpuinfo（x86为flags行，ARM为Features行），
+    读取不到时回退到NumPy的运行时检测，均失败时为空集
+    """
+    flags = set()
+    try:
+        with open("/proc/cpuinfo", encoding="utf-8") as f:
+            for line in f:
+                key, _, value = line.partition(":")
+                if key.strip() in ("flags", "Features"):
+                    flags.update(value.split())
+    except OSError:
+        pass
+    if not flags:
+        flags = _numpy_cpu_flags()
+    return frozenset(flags)
+
+
+def _onnx_quantization_config():
+    """
+    按CPU指令集选择ONNX动态int8量化配置（avx512_vnni → avx512 → avx2 → arm64）
+    
+    Returns:
+        sentence-transformers 的量化配置名；无法确定CPU能力时返回None（不量化）
+    """
+    if platform.machine().lower() in ("aarch64", "arm64"):
+        return "arm64"
+    flags = _cpu_flags()
+    for flag, config in (("avx512_vnni", "avx512_vnni"), ("avx512f", "avx512"), ("avx2", "avx2")):
+        if flag in flags:
+            return config
+    if not flags:
+        print(f"  警告: 无法检测CPU指令集（{platform.system()} {platform.machine()}），ONNX模型将不做int8量化")
+    return None
+
+
+def _bf16_supported() -> bool:
+    """检测CPU是否原生支持BF16运算（x86 AVX512-BF16/AMX-BF16 或 ARM bf16 扩展）"""
+    return bool(_cpu_flags() & {"avx512_bf16", "amx_bf16", "bf16"})
+
+
+def _quantize_model(model):
+    """对Transformer的线性层做int8动态量化，失败时保留FP32模型"""
+    try:
+        import torch
+        transformer = model[0]
+        transformer.auto_model = torch.quantization.quantize_dynamic(
+            transformer.auto_model,
+            {torch.nn.Linear},
+            dtype=torch.qint8
+        )
+        print("  已启用int8动态量化")
+    except Exception as e:
+        print(f"  int8量化失败，继续使用FP32模型: {e}")
+
+
+def _model_cache_dir() -> str:
+    """
+    模型缓存目录：设置了 TRANSFORMERS_CACHE 时使用该目录（如测试固定的仓库内缓存），
+    否则为当前目录下的 ./models
+    """
+    return os.environ.get("TRANSFORMERS_CACHE") or "./models"
+
+
+def _local_cache_path(model_name: str) -> str:
+    """模型在缓存目录下的Hugging Face缓存路径（不带组织名的模型归属 sentence-transformers）"""
+    repo_id = model_name if "/" in model_name else f"sentence-transformers/{model_name}"
+    return os.path.join(_model_cache_dir(), f"models--{repo_id.replace('/', '--')}")
+
+
+def _load_sentence_transformer(SentenceTransformer, model_name: str, **kwargs):
+    """
+    加载SentenceTransformer，本地已缓存时先离线加载
+    
+    离线加载不会向镜像源发送HEAD请求，网络慢或断网时也能立即启动；
+    离线加载失败（缓存不完整等）时再联网加载
+    """
+    if os.path.exists(_local_cache_path(model_name)):
+        try:
+            return SentenceTransformer(model_name, cache_folder=_model_cache_dir(),
+                                       local_files_only=True, **kwargs)
+        except Exception as e:
+            print(f"  离线加载失败，联网重试: {e}")
+    
+    return SentenceTransformer(model_name, cache_folder=_model_cache_dir(), **kwargs)
+
+
+def _onnx_export_dir(model_name: str) -> str:
+    """
+    导出的ONNX量化模型目录：位于 sentence-transformers 缓存目录
+    （SENTENCE_TRANSFORMERS_HOME，未设置时为 HF_HOME/sentence_transformers）下
+    """
+    base = os.environ.get("SENTENCE_TRANSFORMERS_HOME")
+    if not base:
+        from huggingface_hub import constants
+        base = os.path.join(constants.HF_HOME, "sentence_transformers")
+    return os.path.join(base, f"{model_name.replace('/', '--')}-int8")
+
+
+def _load_onnx_model(SentenceTransformer, model_name: str):
+    """
+    加载ONNX Runtime后端的模型，按CPU指令集选择int8动态量化配置
+    
+    首次运行时导出ONNX模型并量化，保存到 <sentence-transformers缓存目录>/<模型名>-int8，
+    之后直接加载；无法确定CPU指令集时使用未量化的ONNX模型
+    """
+    quantization = _onnx_quantization_config()
+    if quantization is None:
+        model = _load_sentence_transformer(SentenceTransformer, model_name, backend="onnx")
+        print("  未识别CPU指令集，使用未量化的ONNX模型")
+        return model
+    
+    quantized_dir = _onnx_export_dir(model_name)
+    file_name = f"onnx/model_qint8_{quantization}.onnx"
+    
+    if not os.path.exists(os.path.join(quantized_dir, file_name)):
+        from sentence_transformers import export_dynamic_quantized_onnx_model
+        
+        print(f"  首次运行，导出int8量化ONNX模型（{quantization}）: {quantized_dir}")
+        model = _load_sentence_transformer(SentenceTransformer, model_name, backend="onnx")
+        # 先保存完整模型（配置、分词器、ONNX权重），再在同一目录生成量化权重
+        model.save(quantized_dir)
+        export_dynamic_quantized_onnx_model(model, quantization, quantized_dir)
+    
+    model = SentenceTransformer(
+        quantized_dir,
+        backend="onnx",
+        model_kwargs={"file_name": file_name}
+    )
+    print(f"  已加载ONNX int8量化模型（{quantization}）")
+    return model
+
+
+def _load_torch_model(SentenceTransformer, model_name: str, quantize: bool, bf16: bool):
+    """
+    加载PyTorch后端模型
+    
+    bf16为True且CPU原生支持BF16时使用BF16权重；否则加载FP32模型，
+    quantize为True时再对线性层做int8动态量化
+    """
+    if bf16:
+        if _bf16_supported():
+            try:
+                import torch
+                model = _load_sentence_transformer(
+                    SentenceTransformer,
+                    model_name,
+                    device='cpu',
+                    model_kwargs={"torch_dtype": torch.bfloat16}
+                )
+                print("  CPU支持BF16，使用BF16权重")
+                return model
+            except Exception as e:
+                print(f"  BF16加载失败，改用FP32: {e}")
+        else:
+            print("  CPU不支持BF16，改用FP32")
+    
+    # 尝试加载模型
+    model = _load_sentence_transformer(SentenceTransformer, model_name, device='cpu')
+    
+    if quantize:
+        _quantize_model(model)
+    return model
+
+
+@functools.lru_cache(maxsize=4)
+def _get_model(model_name: str, quantize: bool = True, backend: str = "onnx", bf16: bool = False):
+    """
+    加载嵌入模型并在进程内缓存（同一配置只加载一次）
+    
+    Returns:
+        (模型, 嵌入维度)；加载失败时抛出异常，且不会被缓存
+    """
+    from sentence_transformers import SentenceTransformer
+    
+    model = None
+    if backend == "onnx":
+        try:
+            model = _load_onnx_model(SentenceTransformer, model_name)
+        except Exception as e:
+            print(f"  ONNX后端不可用，改用PyTorch: {e}")
+    
+    if model is None:
+        model = _load_torch_model(SentenceTransformer, model_name, quantize, bf16)
+    
+    # 直接读取模型配置中的维度，无法读取时才用一次试编码
+    dimensions = model.get_sentence_embedding_dimension()
+    if dimensions is None:
+        dimensions = model.encode(["测试文本"]).shape[1]
+    return model, dimensions
 
 
 class TextEmbeddingModel:
     """文本嵌入模型类"""
     
-    def __init__(self, model_name: str = "paraphrase-MiniLM-L3-v2"):
+    def __init__(self, model_name: str = "paraphrase-MiniLM-L3-v2",
+                 cache_size: int = 8192,
+                 quantize: bool = True,
+                 backend: str = "onnx",
+                 bf16: bool = False):
         """
         初始化嵌入模型
         
@@ -38,9 +401,23 @@ class TextEmbeddingModel:
                         - 'BAAI/bge-small-zh' (中文优化)
                         - 'all-MiniLM-L6-v2' (英文)
                         - 'paraphrase-multilingual-MiniLM-L12-v2' (多语言)
+            cache_size: 嵌入缓存的最大条目数（LRU淘汰）
+            quantize: PyTorch后端是否对线性层做int8动态量化（FP32权重时生效）
+            backend: 推理后端，"onnx" 使用ONNX Runtime加载按CPU指令集量化的int8模型，
+                     失败时自动回退到 "torch"
+            bf16: PyTorch后端是否使用BF16权重（CPU原生支持BF16时生效，否则使用FP32；
+                  启用后不再做int8量化）
         """
         self.model_name = model_name
         
+        # 文本 -> 嵌入向量的LRU缓存，重复文本无需再次编码
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[tuple, np.ndarray]" = OrderedDict()
+        
+        # ============ 关键设置：使用镜像源 ============
+        # 必须在导入任何 huggingface 相关模块之前设置（已显式配置时保留用户设置）
+        os.environ.setdefault('HF_ENDPOINT', 'https://hf-mirror.com')
+        
         print(f"正在加载嵌入模型: {model_name}")
         print(f"使用镜像源: {os.environ.get('HF_ENDPOINT', '默认')}")
         
@@ -49,17 +426,9 @@ class TextEmbeddingModel:
         
         try:
             if SENTENCE_TRANSFORMERS_AVAILABLE:
-                # 尝试加载模型
-                self.model = SentenceTransformer(
-                    model_name,
-                    cache_folder="./models",
-                    device='cpu'
-                )
+                # 进程内共享：同一配置的模型只加载一次，维度随模型一起缓存
+                self.model, self.dimensions = _get_model(model_name, quantize, backend, bf16)
                 print(f"  模型加载成功！")
-                
-                # 测试获取维度
-                test_embedding = self.model.encode(["测试文本"])
-                self.dimensions = test_embedding.shape[1]
                 print(f"  嵌入维度: {self.dimensions}")
             else:
                 raise ImportError("sentence-transformers 未安装")
@@ -71,12 +440,10 @@ class TextEmbeddingModel:
     
     def _check_local_cache(self):
         """检查本地模型缓存"""
-        cache_dir = "./models"
+        cache_dir = _model_cache_dir()
         if os.path.exists(cache_dir):
             # 检查是否有已下载的模型
-            import glob
-            model_pattern = f"models--sentence-transformers--{self.model_name.replace('/', '--')}"
-            model_path = os.path.join(cache_dir, model_pattern)
+            model_path = _local_cache_path(self.model_name)
             
             if os.path.exists(model_path):
                 print(f"  发现本地缓存模型: {model_path}")
@@ -97,85 +464,99 @@ class TextEmbeddingModel:
         class FallbackModel:
             def __init__(self, dim=384):
                 self.dim = dim
-                import numpy as np
-                self.np = np
             
             def encode(self, texts, **kwargs):
                 if isinstance(texts, str):
                     texts = [texts]
                 
-                embeddings = []
-                for text in texts:
-                    # 基于文本的确定性伪随机向量
-                    import hashlib
-                    seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
-                    self.np.random.seed(seed)
-                    vec = self.np.random.randn(self.dim)
-                    # 归一化
-                    norm = self.np.linalg.norm(vec)
-                    if norm > 0:
-                        vec = vec / norm
-                    embeddings.append(vec)
-                
-                return self.np.array(embeddings)
+                # 基于文本哈希的确定性单位向量
+                return hash_embeddings(texts, self.dim)
         
         self.model = FallbackModel(384)
         self.dimensions = 384
         self.model_name = "fallback-offline-model"
         print("  回退模型创建成功")
     
-    def get_embedding(self, text: str) -> np.ndarray:
+    def get_embedding(self, text: str, normalize: bool = False) -> np.ndarray:
         """
         获取单个文本的嵌入向量
         
         Args:
             text: 输入文本
+            normalize: 是否在编码时做L2归一化（默认不归一化，向量存储写入和查询时显式开启）
             
         Returns:
             嵌入向量
         """
-        return self.model.encode(text)
+        return self.get_embeddings([text], normalize=normalize)[0]
     
-    def get_embeddings(self, texts: List[str]) -> np.ndarray:
+    def get_embeddings(self, texts: List[str], normalize: bool = False) -> np.ndarray:
         """
         获取多个文本的嵌入向量
         
         Args:
-            texts: 输入文本列表
+            texts: 输入文本列表（也可以是元组、生成器等任意可迭代对象）
+            normalize: 是否在编码时做L2归一化（默认不归一化，向量存储写入和查询时显式开启）
             
         Returns:
             嵌入向量矩阵
         """
-        return self.model.encode(texts)
+        texts = list(texts)
+        if not texts:
+            return np.empty((0, self.dimensions), dtype=np.float32)
+        
+        cache = self._cache
+        keys = [(t, normalize) for t in texts]
+        
+        # 只对缓存中没有的文本做批量编码（同一批次内的重复文本只编码一次）
+        missing = list(dict.fromkeys(k for k in keys if k not in cache))
+        if missing:
+            # 归一化在编码器内部完成（回退模型忽略该参数，其输出本身已归一化）
+            new_embeddings = self.model.encode(
+                [text for text, _ in missing],
+                batch_size=_ENCODE_BATCH_SIZE,
+                convert_to_numpy=True,
+                normalize_embeddings=normalize,
+                show_progress_bar=False
+            )
+            # 缓存行的副本：行视图会让整个批次矩阵常驻内存，缓存占用不再受cache_size约束
+            for key, embedding in zip(missing, new_embeddings):
+                cache[key] = embedding.copy()
+        
+        result = []
+        for key in keys:
+            cache.move_to_end(key)
+            result.append(cache[key])
+        embeddings = np.stack(result)
+        
+        # 超出容量时淘汰最久未使用的条目
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+        
+        return embeddings
     
-    def compute_similarity(self, query: str, sentences: List[str]) -> List[float]:
+    def compute_similarity(self, query: str, sentences: List[str],
+                           int8: bool = False) -> List[float]:
         """
         计算查询文本与多个句子的相似度
         
         Args:
             query: 查询文本
             sentences: 句子列表
+            int8: 是否先将向量量化为int8再计算余弦（需要SimSIMD，带宽减少4倍，
+                  精度略有损失；SimSIMD不可用时忽略）
             
         Returns:
             相似度列表
         """
-        # 获取嵌入
-        query_embedding = self.get_embedding(query)
-        sentence_embeddings = self.get_embeddings(sentences)
-        
-        # 计算余弦相似度
-        similarities = []
-        query_norm = np.linalg.norm(query_embedding)
-        
-        for emb in sentence_embeddings:
-            sentence_norm = np.linalg.norm(emb)
-            if query_norm > 0 and sentence_norm > 0:
-                similarity = np.dot(query_embedding, emb) / (query_norm * sentence_norm)
-                similarities.append(float(similarity))
-            else:
-                similarities.append(0.0)
+        if not sentences:
+            return []
         
-        return similarities
+        # 查询与句子合并为一次批量编码，并在编码时完成L2归一化
+        embeddings = self.get_embeddings([query] + list(sentences), normalize=True)
+        
+        similarities = cosine_similarities(embeddings[0], embeddings[1:], int8=int8, normalized=True)
+        return similarities.tolist()
 
 
 # 测试函数
@@ -250,7 +631,7 @@ def test_embedding_model():
 
 
 # 在文件末尾添加导出
-__all__ = ["TextEmbeddingModel", "test_embedding_model"]
+__all__ = ["TextEmbeddingModel", "cosine_similarities", "quantize_int8", "test_embedding_model"]
 
 if __name__ == "__main__":
     test_embedding_model()
\ No newline at end of file
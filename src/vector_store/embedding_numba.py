@@ -0,0 +1,42 @@
+"""
+离线回退模型的Numba内核
+
+单独成模块：导入numba本身约需150-230ms，embedding 只在首次生成回退嵌入时才导入本模块
+"""
+import numba
+import numpy as np
+
+try:
+    from .embedding import _XORSHIFT_MULT, _UNIT_SCALE
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    from src.vector_store.embedding import _XORSHIFT_MULT, _UNIT_SCALE
+
+
+@numba.njit(parallel=True, cache=True)
+def fill_numba(states, dim):
+    """Numba实现：与 embedding._fill_numpy 相同的算法，按行并行且不回调Python"""
+    n = states.shape[0]
+    out = np.empty((n, dim), dtype=np.float32)
+    for i in numba.prange(n):
+        x = states[i]
+        row = np.empty(dim, dtype=np.float64)
+        total = 0.0
+        for j in range(dim):
+            x ^= x >> np.uint64(12)
+            x ^= x << np.uint64(25)
+            x ^= x >> np.uint64(27)
+            value = float((x * _XORSHIFT_MULT) >> np.uint64(11)) * _UNIT_SCALE - 1.0
+            row[j] = value
+            total += value
+        mean = total / dim
+        sq = 0.0
+        for j in range(dim):
+            row[j] -= mean
+            sq += row[j] * row[j]
+        norm = np.sqrt(sq)
+        if norm == 0.0:
+            norm = 1.0
+        for j in range(dim):
+            out[i, j] = row[j] / norm
+    return out
@@ -9,6 +9,12 @@ import numpy as np
 # 强制设置镜像源
 os.environ['HF_ENDPOINT'] = 'https://hf-mirror.com'
 
+try:
+    from .embedding import hash_embeddings, cosine_similarities
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    from src.vector_store.embedding import hash_embeddings, cosine_similarities
+
 class RobustEmbeddingModel:
     """健壮的嵌入模型，自动处理各种异常"""
     
@@ -84,57 +90,48 @@ class RobustEmbeddingModel:
         class FallbackModel:
             def __init__(self, dim=384):
                 self.dim = dim
-                import numpy as np
-                self.np = np
             
             def encode(self, texts, **kwargs):
                 if isinstance(texts, str):
                     texts = [texts]
                 
-                embeddings = []
-                for text in texts:
-                    # 基于文本的确定性伪随机向量
-                    import hashlib
-                    seed = int(hashlib.md5(text.encode()).hexdigest()[:8], 16)
-                    self.np.random.seed(seed)
-                    vec = self.np.random.randn(self.dim)
-                    # 归一化
-                    norm = self.np.linalg.norm(vec)
-                    if norm > 0:
-                        vec = vec / norm
-                    embeddings.append(vec)
-                
-                return self.np.array(embeddings)
+                # 基于文本哈希的确定性单位向量（与 embedding.py 的回退模型共用实现）
+                return hash_embeddings(texts, self.dim)
         
         self.model = FallbackModel(384)
         self.dimensions = 384
         self.model_name = "fallback-offline-model"
     
     def get_embedding(self, text: str) -> np.ndarray:
-        """获取单个文本嵌入"""
-        return self.model.encode(text)
+        """获取单个文本嵌入（L2归一化）"""
+        return self.model.encode(
+            text,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
     
     def get_embeddings(self, texts: List[str]) -> np.ndarray:
-        """获取批量文本嵌入"""
-        return self.model.encode(texts)
+        """获取批量文本嵌入（L2归一化）"""
+        return self.model.encode(
+            texts,
+            batch_size=64,
+            convert_to_numpy=True,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
     
     def compute_similarity(self, query: str, sentences: List[str]) -> List[float]:
         """计算相似度"""
-        query_embedding = self.get_embedding(query)
-        sentence_embeddings = self.get_embeddings(sentences)
-        
-        similarities = []
-        query_norm = np.linalg.norm(query_embedding)
+        sentences = list(sentences)
+        if not sentences:
+            return []
         
-        for emb in sentence_embeddings:
-            sentence_norm = np.linalg.norm(emb)
-            if query_norm > 0 and sentence_norm > 0:
-                similarity = np.dot(query_embedding, emb) / (query_norm * sentence_norm)
-                similarities.append(float(similarity))
-            else:
-                similarities.append(0.0)
+        # 查询与候选句子合并为一次批量编码，避免模型被重复调用
+        embeddings = self.get_embeddings([query] + sentences)
         
-        return similarities
+        # 与 TextEmbeddingModel 共用相似度计算（嵌入在编码时已L2归一化）
+        return cosine_similarities(embeddings[0], embeddings[1:], normalized=True).tolist()
 
 # 主函数：测试模型
 def test_robust_model():
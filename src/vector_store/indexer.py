@@ -3,7 +3,6 @@
 """
 import os
 import sys
-import json
 from typing import List, Dict, Any
 
 # 添加当前目录到路径
@@ -18,18 +17,39 @@ except ImportError:
     # 如果相对导入失败，尝试绝对导入
     from src.vector_store.chroma_store import ChromaVectorStore
 
+# 元数据中标签的分隔符（ASCII单元分隔符US），标签名中含逗号也不会冲突
+LABEL_SEPARATOR = "\x1f"
+
 
 class DataIndexer:
     """数据索引器，负责将GitHub数据转换为向量存储格式"""
     
-    def __init__(self, collection_name: str = "code_repository"):
+    def __init__(self, collection_name: str = "code_repository", batch_size: int = 256,
+                 persist: bool = True, hnsw_metadata: Dict[str, Any] = None,
+                 embedder=None, client=None):
         """
         初始化索引器
         
         Args:
             collection_name: 集合名称
+            batch_size: 每批嵌入并写入的文档数；add_documents按批流水线处理，
+                        峰值内存随批大小而非文档总数增长
+            persist: 是否持久化到磁盘，为False时向量存储只保存在内存中
+            hnsw_metadata: 新建集合时的HNSW索引参数，见 ChromaVectorStore
+            embedder: 已初始化的嵌入模型，为None时由向量存储新建
+            client: 已创建的ChromaDB客户端，传入时与其他存储共用
         """
-        self.vector_store = ChromaVectorStore(collection_name)
+        self.vector_store = ChromaVectorStore(collection_name, persist=persist,
+                                              hnsw_metadata=hnsw_metadata,
+                                              embedder=embedder,
+                                              client=client)
+        self.batch_size = batch_size
+        
+        # 按模型的最大序列长度截断内容（回退模型没有分词器，仍按字符数截断）
+        model = self.vector_store.embedder.model
+        self._tokenizer = getattr(model, "tokenizer", None)
+        self._max_tokens = getattr(model, "max_seq_length", None)
+        
         print(f"  数据索引器初始化完成")
         print(f"   集合名称: {collection_name}")
     
@@ -46,6 +66,22 @@ class DataIndexer:
         
         print(f"  开始索引 {len(code_files_data)} 个代码文件...")
         
+        documents = self.prepare_code_documents(code_files_data)
+        
+        # 添加到向量存储
+        self.vector_store.add_documents(documents, batch_size=self.batch_size)
+        print(f"  代码文件索引完成: {len(documents)} 个文件")
+    
+    def prepare_code_documents(self, code_files_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将代码文件数据转换为待索引文档（不写入向量存储）
+        
+        Args:
+            code_files_data: 代码文件数据列表
+            
+        Returns:
+            文档列表
+        """
         documents = []
         for file_data in code_files_data:
             # 构建文档
@@ -64,9 +100,7 @@ class DataIndexer:
                 "metadata": metadata
             })
         
-        # 添加到向量存储
-        self.vector_store.add_documents(documents)
-        print(f"  代码文件索引完成: {len(documents)} 个文件")
+        return documents
     
     def index_issues(self, issues_data: List[Dict[str, Any]]):
         """
@@ -81,6 +115,22 @@ class DataIndexer:
         
         print(f"  开始索引 {len(issues_data)} 个Issues...")
         
+        documents = self.prepare_issue_documents(issues_data)
+        
+        # 添加到向量存储
+        self.vector_store.add_documents(documents, batch_size=self.batch_size)
+        print(f"  Issues索引完成: {len(documents)} 个Issue")
+    
+    def prepare_issue_documents(self, issues_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将Issue数据转换为待索引文档（不写入向量存储）
+        
+        Args:
+            issues_data: Issue数据列表
+            
+        Returns:
+            文档列表
+        """
         documents = []
         for issue_data in issues_data:
             # 构建文档
@@ -98,16 +148,16 @@ class DataIndexer:
             
             # 添加标签信息
             if issue_data.get("labels"):
-                metadata["labels"] = json.dumps([label.get("name", "") for label in issue_data["labels"]])
+                metadata["labels"] = LABEL_SEPARATOR.join(
+                    label.get("name", "") for label in issue_data["labels"] if label.get("name")
+                )
             
             documents.append({
                 "text": text,
                 "metadata": metadata
             })
         
-        # 添加到向量存储
-        self.vector_store.add_documents(documents)
-        print(f"  Issues索引完成: {len(documents)} 个Issue")
+        return documents
     
     def index_pull_requests(self, prs_data: List[Dict[str, Any]]):
         """
@@ -122,6 +172,22 @@ class DataIndexer:
         
         print(f"  开始索引 {len(prs_data)} 个Pull Requests...")
         
+        documents = self.prepare_pr_documents(prs_data)
+        
+        # 添加到向量存储
+        self.vector_store.add_documents(documents, batch_size=self.batch_size)
+        print(f"  Pull Requests索引完成: {len(documents)} 个PR")
+    
+    def prepare_pr_documents(self, prs_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将PR数据转换为待索引文档（不写入向量存储）
+        
+        Args:
+            prs_data: PR数据列表
+            
+        Returns:
+            文档列表
+        """
         documents = []
         for pr_data in prs_data:
             # 构建文档
@@ -143,9 +209,7 @@ class DataIndexer:
                 "metadata": metadata
             })
         
-        # 添加到向量存储
-        self.vector_store.add_documents(documents)
-        print(f"  Pull Requests索引完成: {len(documents)} 个PR")
+        return documents
     
     def index_readme_files(self, readme_data: List[Dict[str, Any]]):
         """
@@ -160,6 +224,21 @@ class DataIndexer:
         
         print(f"📖 开始索引 {len(readme_data)} 个README文件...")
         
+        documents = self.prepare_readme_documents(readme_data)
+        
+        self.vector_store.add_documents(documents, batch_size=self.batch_size)
+        print(f"  README文件索引完成: {len(documents)} 个文件")
+    
+    def prepare_readme_documents(self, readme_data: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        将README数据转换为待索引文档（不写入向量存储）
+        
+        Args:
+            readme_data: README数据列表
+            
+        Returns:
+            文档列表
+        """
         documents = []
         for readme in readme_data:
             text = self._prepare_readme_text(readme)
@@ -175,8 +254,64 @@ class DataIndexer:
                 "metadata": metadata
             })
         
-        self.vector_store.add_documents(documents)
-        print(f"  README文件索引完成: {len(documents)} 个文件")
+        return documents
+    
+    def index_all(self, code_files_data: List[Dict[str, Any]] = None,
+                  issues_data: List[Dict[str, Any]] = None,
+                  prs_data: List[Dict[str, Any]] = None,
+                  readme_data: List[Dict[str, Any]] = None):
+        """
+        一次性索引所有类型的数据：合并为一个文档列表，只调用一次add_documents
+        
+        Args:
+            code_files_data: 代码文件数据列表
+            issues_data: Issue数据列表
+            prs_data: PR数据列表
+            readme_data: README数据列表
+        """
+        documents = []
+        documents.extend(self.prepare_code_documents(code_files_data or []))
+        documents.extend(self.prepare_issue_documents(issues_data or []))
+        documents.extend(self.prepare_pr_documents(prs_data or []))
+        documents.extend(self.prepare_readme_documents(readme_data or []))
+        
+        if not documents:
+            print("  没有数据可索引")
+            return
+        
+        print(f"  开始索引 {len(documents)} 个文档...")
+        self.vector_store.add_documents(documents, batch_size=self.batch_size)
+        print(f"  全部数据索引完成: {len(documents)} 个文档")
+    
+    def _clip(self, text: str, max_chars: int) -> str:
+        """
+        截断文本内容，只保留编码器实际能看到的部分
+        
+        有分词器时按token截断（预留32个token给标题行和特殊符号），
+        否则按字符数截断
+        """
+        if self._tokenizer is None or not self._max_tokens:
+            return text[:max_chars]
+        
+        budget = max(self._max_tokens - 32, 1)
+        # 先做宽松的字符预截断，避免对超长文件整体分词
+        head = text[:budget * 16]
+        try:
+            encoded = self._tokenizer(
+                head,
+                add_special_tokens=False,
+                truncation=True,
+                max_length=budget,
+                return_offsets_mapping=True
+            )
+        except Exception:
+            # 慢速分词器不支持offset_mapping
+            return text[:max_chars]
+        
+        offsets = encoded["offset_mapping"]
+        if len(offsets) < budget:
+            return head
+        return head[:offsets[-1][1]]
     
     def _prepare_code_text(self, file_data: Dict[str, Any]) -> str:
         """准备代码文件文本"""
@@ -184,15 +319,9 @@ class DataIndexer:
         language = file_data.get("language", "")
         path = file_data.get("path", "")
         
-        # 构建有意义的文本表示
-        text = f"代码文件: {path}\n"
-        text += f"编程语言: {language}\n"
-        if content:
-            text += f"内容:\n{content[:1000]}\n"  # 限制内容长度
-        else:
-            text += "内容: [空]\n"
-        
-        return text
+        # 构建有意义的文本表示（内容限制长度）
+        body = f"内容:\n{self._clip(content, 1000)}\n" if content else "内容: [空]\n"
+        return f"代码文件: {path}\n编程语言: {language}\n{body}"
     
     def _prepare_issue_text(self, issue_data: Dict[str, Any]) -> str:
         """准备Issue文本"""
@@ -200,48 +329,32 @@ class DataIndexer:
         body = issue_data.get("body", "")
         labels = issue_data.get("labels", [])
         
-        # 构建有意义的文本表示
-        text = f"Issue: {title}\n"
-        
         # 添加标签信息
+        labels_line = ""
         if labels:
-            label_names = [label.get("name", "") for label in labels]
-            text += f"标签: {', '.join(label_names)}\n"
+            labels_line = f"标签: {', '.join(label.get('name', '') for label in labels)}\n"
         
-        if body:
-            text += f"描述:\n{body[:2000]}\n"  # 限制内容长度
-        else:
-            text += "描述: [空]\n"
-        
-        return text
+        # 构建有意义的文本表示（描述限制长度）
+        description = f"描述:\n{self._clip(body, 2000)}\n" if body else "描述: [空]\n"
+        return f"Issue: {title}\n{labels_line}{description}"
     
     def _prepare_pr_text(self, pr_data: Dict[str, Any]) -> str:
         """准备Pull Request文本"""
         title = pr_data.get("title", "")
         body = pr_data.get("body", "")
         
-        # 构建有意义的文本表示
-        text = f"Pull Request: {title}\n"
-        
-        if body:
-            text += f"描述:\n{body[:2000]}\n"  # 限制内容长度
-        else:
-            text += "描述: [空]\n"
-        
-        return text
+        # 构建有意义的文本表示（描述限制长度）
+        description = f"描述:\n{self._clip(body, 2000)}\n" if body else "描述: [空]\n"
+        return f"Pull Request: {title}\n{description}"
     
     def _prepare_readme_text(self, readme_data: Dict[str, Any]) -> str:
         """准备README文本"""
         content = readme_data.get("content", "")
         path = readme_data.get("path", "")
         
-        text = f"README文件: {path}\n"
-        if content:
-            text += f"内容:\n{content[:3000]}\n"  # 限制内容长度
-        else:
-            text += "内容: [空]\n"
-        
-        return text
+        # 内容限制长度
+        body = f"内容:\n{self._clip(content, 3000)}\n" if content else "内容: [空]\n"
+        return f"README文件: {path}\n{body}"
     
     def get_vector_store(self) -> ChromaVectorStore:
         """获取向量存储实例"""
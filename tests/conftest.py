@@ -0,0 +1,98 @@
+"""
+pytest 公共配置与fixture
+"""
+import os
+import re
+from pathlib import Path
+
+import pytest
+
+# 固定Hugging Face缓存到仓库内的 .cache/hf（需在导入 sentence_transformers 之前设置），
+# 无论从哪个目录运行pytest、多次运行之间都复用同一份已下载的模型
+_HF_CACHE = str(Path(__file__).resolve().parent.parent / ".cache" / "hf")
+os.environ.setdefault("HF_HOME", _HF_CACHE)
+os.environ.setdefault("TRANSFORMERS_CACHE", _HF_CACHE)
+
+# HuggingFace镜像源，整个测试会话只设置一次（已显式配置时保留用户设置）
+os.environ.setdefault("HF_ENDPOINT", "https://hf-mirror.com")
+
+
+def pytest_addoption(parser):
+    parser.addoption("--run-slow", action="store_true", default=False,
+                     help="运行标记为slow的端到端测试（CI完整构建使用）")
+
+
+def pytest_collection_modifyitems(config, items):
+    """未指定 --run-slow 时跳过标记为slow的测试"""
+    if config.getoption("--run-slow"):
+        return
+    skip_slow = pytest.mark.skip(reason="slow：使用 --run-slow 运行")
+    for item in items:
+        if "slow" in item.keywords:
+            item.add_marker(skip_slow)
+
+
+@pytest.fixture
+def collection_name():
+    """
+    生成按xdist worker区分的集合名称
+    
+    pytest -n auto 下多个worker共用同一个ChromaDB持久化目录，
+    集合名加上worker编号（gw0、gw1...）后各worker互不干扰
+    """
+    worker = os.environ.get("PYTEST_XDIST_WORKER", "master")
+    
+    def make(base: str) -> str:
+        return f"{base}_{worker}"
+    
+    return make
+
+
+@pytest.fixture(scope="session")
+def embedder(tmp_path_factory):
+    """
+    整个测试会话共享一个嵌入模型，模型权重每个pytest进程只加载一次
+    
+    xdist并行时各worker通过文件锁依次加载：首个worker在冷缓存下完成下载，
+    其余worker等锁释放后直接命中本地缓存，避免同时写入同一个HF缓存目录
+    """
+    from src.vector_store.embedding import TextEmbeddingModel
+    
+    if "PYTEST_XDIST_WORKER" not in os.environ:
+        return TextEmbeddingModel()
+    
+    from filelock import FileLock
+    
+    # 所有worker的basetemp位于同一父目录下，锁文件在worker之间共享
+    lock_path = tmp_path_factory.getbasetemp().parent / "embedding_model.lock"
+    with FileLock(str(lock_path)):
+        return TextEmbeddingModel()
+
+
+@pytest.fixture(scope="session")
+def chroma_client():
+    """整个测试会话共用一个内存ChromaDB客户端，各测试只在其上创建各自的集合"""
+    import chromadb
+    from chromadb.config import Settings
+    return chromadb.EphemeralClient(settings=Settings(anonymized_telemetry=False, allow_reset=True))
+
+
+@pytest.fixture
+def hnsw_metadata():
+    """测试集合只有几条文档，用较小的HNSW建图参数（默认 M=16、construction_ef=100）"""
+    return {"hnsw:M": 8, "hnsw:construction_ef": 16}
+
+
+@pytest.fixture
+def in_memory_store(request, chroma_client, embedder, collection_name, hnsw_metadata):
+    """
+    每个测试独占一个内存ChromaDB集合（EphemeralClient，不落盘）
+    
+    集合名取自测试名，测试结束后删除集合
+    """
+    from src.vector_store.chroma_store import ChromaVectorStore
+    
+    name = collection_name(re.sub(r"[^A-Za-z0-9_-]", "_", request.node.name))
+    store = ChromaVectorStore.from_client(chroma_client, name, hnsw_metadata=hnsw_metadata, embedder=embedder)
+    yield store
+    store.client.delete_collection(store.collection.name)
@@ -2,82 +2,38 @@
 """
 集成测试脚本 - 简化版
 """
-import os
 import sys
-from pathlib import Path
+import logging
 
-# 添加项目根目录到Python路径
-project_root = Path(__file__).resolve().parent.parent
-sys.path.insert(0, str(project_root))
+import pytest
 
-# 设置镜像源
-os.environ['HF_ENDPOINT'] = 'https://hf-mirror.com'
+log = logging.getLogger(__name__)
 
-def test_data_integration():
-    """测试数据集成"""
-    print("=" * 60)
-    print("  数据集成测试")
-    print("=" * 60)
+@pytest.mark.slow
+def test_data_integration(tmp_path, chroma_client, embedder, collection_name, hnsw_metadata):
+    """
+    测试数据集成（端到端：加载数据、索引、检索并保存集成信息）
     
-    try:
-        # 首先检查是否有数据文件
-        data_dir = project_root / "data"
-        print(f"数据目录: {data_dir}")
-        
-        if data_dir.exists():
-            files = list(data_dir.glob("*.json"))
-            print(f"找到 {len(files)} 个数据文件:")
-            for f in files:
-                print(f"  - {f.name}")
-        else:
-            print("  数据目录不存在")
-        
-        # 导入并测试
-        print("\n导入数据集成器...")
-        from src.vector_store.data_integrator import DataIntegrator
-        
-        print("创建数据集成器...")
-        integrator = DataIntegrator("test_integration")
-        
-        print("开始集成数据...")
-        result = integrator.integrate_all_data("test-repo")
-        
-        print(f"\n  集成成功！")
-        print(f"   总文档数: {result['total_documents']}")
-        
-        return True
-        
-    except ImportError as e:
-        print(f"  导入失败: {e}")
-        print("请确保在项目根目录运行")
-        return False
-    except Exception as e:
-        print(f"  集成测试失败: {e}")
-        import traceback
-        traceback.print_exc()
-        return False
-
-def main():
-    """主函数"""
-    print(" 数据集成测试")
+    数据目录使用临时目录（无数据文件时各加载器使用示例数据），
+    集合建在会话共享的内存客户端上，测试结束后删除
+    """
+    from src.vector_store.data_integrator import DataIntegrator
     
-    # 运行测试
-    success = test_data_integration()
+    name = collection_name("test_integration")
+    log.info("创建数据集成器: %s", name)
+    integrator = DataIntegrator(name, data_dir=tmp_path, client=chroma_client,
+                                embedder=embedder, hnsw_metadata=hnsw_metadata)
     
-    if success:
-        print("\n 数据集成测试通过！")
-        print("\n 现在可以:")
-        print("1. 查看集成结果: python -c \"from src.vector_store.chroma_store import ChromaVectorStore; s=ChromaVectorStore('test_integration'); print(s.get_collection_info())\"")
-        print("2. 运行搜索测试: python scripts/qa_test.py")
-        print("3. 开始Day 5开发")
-    else:
-        print("\n  数据集成测试失败")
-        print("请检查:")
-        print("1. 是否在项目根目录运行？")
-        print("2. 是否安装了所有依赖？")
-        print("3. 是否有数据文件？")
+    try:
+        log.info("开始集成数据...")
+        result = integrator.integrate_all_data("test-repo")
+    finally:
+        chroma_client.delete_collection(name)
     
-    print("\n" + "=" * 60)
+    assert "total_documents" in result, f"集成结果缺少文档数: {result}"
+    assert result["total_documents"] > 0, f"集成后集合为空: {result}"
+    assert (tmp_path / "integration_test-repo.json").exists(), "集成信息未保存到数据目录"
+    log.info("总文档数: %s", result['total_documents'])
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(pytest.main([__file__, "--run-slow"]))
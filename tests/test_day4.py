@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+demo4 测试：数据向量化与存储功能
+"""
+
+import sys
+import logging
+
+import numpy as np
+import pytest
+
+log = logging.getLogger(__name__)
+
+def test_imports():
+    """测试导入"""
+    from src.vector_store.embedding import TextEmbeddingModel
+    from src.vector_store.chroma_store import ChromaVectorStore
+    from src.vector_store.indexer import DataIndexer
+
+def test_embedding_model(embedder):
+    """测试嵌入模型"""
+    assert embedder.model_name, "模型名称获取失败"
+    assert embedder.dimensions > 0, "嵌入维度获取失败"
+    log.info("模型名称: %s", embedder.model_name)
+    log.info("嵌入维度: %s", embedder.dimensions)
+    
+    # 单个文本、批量文本、查询文本合并为一次批量编码，再按位置切分
+    log.info("测试批量文本嵌入...")
+    text = "测试文本"
+    texts = ["文本1", "文本2", "文本3"]
+    query = "测试"
+    vectors = embedder.get_embeddings([text] + texts + [query])
+    embedding, embeddings, query_embedding = vectors[0], vectors[1:4], vectors[4]
+    assert embedding.shape == (embedder.dimensions,), f"嵌入形状错误: {embedding.shape}"
+    assert embeddings.shape == (3, embedder.dimensions), f"批量嵌入形状错误: {embeddings.shape}"
+    
+    # 单个文本接口应与批量结果一致（命中嵌入缓存，不再前向计算）
+    log.info("测试单个文本嵌入...")
+    assert np.array_equal(embedder.get_embedding(text), embedding), "单个嵌入与批量嵌入不一致"
+    
+    # 测试相似度计算：复用已算好的嵌入
+    log.info("测试相似度计算...")
+    from src.vector_store.embedding import cosine_similarities
+    similarities = cosine_similarities(query_embedding, embeddings)
+    assert similarities.shape == (3,), f"相似度数量错误: {len(similarities)}"
+    log.info("相似度值: %s", np.round(similarities, 4).tolist())
+
+def test_chromadb(in_memory_store):
+    """测试ChromaDB"""
+    store = in_memory_store
+    
+    assert store.client, "ChromaDB客户端初始化失败"
+    assert store.collection, "集合创建失败"
+    log.info("集合创建成功: %s", store.collection.name)
+    
+    # 测试添加文档
+    log.info("测试添加文档...")
+    test_documents = [
+        {
+            "text": "测试文档1 - 用于验证ChromaDB功能",
+            "metadata": {"id": 1, "type": "test", "category": "demo"}
+        },
+        {
+            "text": "测试文档2 - 这是第二个测试文档",
+            "metadata": {"id": 2, "type": "test", "category": "demo"}
+        }
+    ]
+    
+    store.add_documents(test_documents)
+    
+    # 测试搜索
+    log.info("测试语义搜索...")
+    results = store.search_arrays("测试文档", n_results=2)
+    scores = results["scores"]
+    
+    assert len(scores) > 0, "搜索无结果"
+    log.info("搜索成功，找到 %d 个结果", len(scores))
+    log.info("相似度: %s", np.round(scores, 4).tolist())
+    # 检查相似度是否在合理范围
+    assert ((scores >= 0) & (scores <= 1)).all(), f"相似度超出范围: {scores}"
+    
+    # 测试集合信息
+    log.info("测试集合信息...")
+    info = store.get_collection_info()
+    
+    assert "collection_name" in info and "document_count" in info, f"集合信息获取失败: {info}"
+    log.info("集合: %s", info['collection_name'])
+    log.info("文档数: %s", info['document_count'])
+    assert info['document_count'] == 2, f"文档数量错误: {info['document_count']}"
+
+def test_add_documents_twice(in_memory_store):
+    """测试重复添加相同文档时不误判元数据变化"""
+    store = in_memory_store
+    
+    def make_documents():
+        # 元数据包含ChromaDB存储时会转换的值：None、NumPy标量
+        return [
+            {
+                "text": "重复添加测试文档1",
+                "metadata": {"source": "a.py", "line": np.int64(3), "score": 0.5,
+                             "is_test": True, "parent": None}
+            },
+            {
+                "text": "重复添加测试文档2",
+                "metadata": {"source": "b.py", "line": 7, "score": np.float32(0.25)}
+            },
+            {"text": "   ", "metadata": {"source": "empty.py"}}
+        ]
+    
+    first = store.add_documents(make_documents())
+    assert first["added"] == 2, f"首次添加数量错误: {first}"
+    
+    second = store.add_documents(make_documents())
+    assert second["updated"] == 0, f"相同元数据被误判为变化: {second}"
+    assert second["added"] == 0, f"已存在的文档被重复添加: {second}"
+    assert second["skipped"] == 2, f"跳过数量错误: {second}"
+    assert store.collection.count() == 2, f"文档数量错误: {store.collection.count()}"
+
+def test_indexer(chroma_client, embedder, collection_name, hnsw_metadata):
+    """测试数据索引器"""
+    from src.vector_store.indexer import DataIndexer
+    
+    # 测试初始化
+    log.info("初始化数据索引器...")
+    indexer = DataIndexer(collection_name("test_indexer_fixed"), client=chroma_client,
+                          hnsw_metadata=hnsw_metadata, embedder=embedder)
+    
+    assert indexer.vector_store, "数据索引器初始化失败"
+    
+    # 代码文件、Issue、PR合并为一次add_documents写入
+    code_files = [
+        {
+            "path": "test.py",
+            "content": "def test():\n    print('hello')",
+            "language": "python",
+            "name": "test.py",
+            "repo_name": "test_repo",
+            "size": 100
+        }
+    ]
+    
+    issues = [
+        {
+            "title": "测试Issue",
+            "body": "这是一个测试Issue",
+            "html_url": "https://github.com/test/issues/1",
+            "number": 1,
+            "state": "open",
+            "user": {"login": "test_user"},
+            "repo_name": "test_repo",
+            "created_at": "2024-01-01T00:00:00Z",
+            "comments": 0,
+            "labels": []
+        }
+    ]
+    
+    # PR的布尔值字段需要能正常写入元数据
+    prs = [
+        {
+            "title": "测试PR",
+            "body": "这是一个测试PR",
+            "html_url": "https://github.com/test/pull/1",
+            "number": 1,
+            "state": "open",
+            "user": {"login": "test_user"},
+            "repo_name": "test_repo",
+            "created_at": "2024-01-01T00:00:00Z",
+            "merged": False,  # 布尔值会被转换为字符串
+            "comments": 0
+        }
+    ]
+    
+    log.info("测试批量索引...")
+    indexer.index_all(code_files_data=code_files, issues_data=issues, prs_data=prs)
+    
+    # 测试获取向量存储
+    log.info("测试获取向量存储...")
+    vector_store = indexer.get_vector_store()
+    
+    assert vector_store, "向量存储获取失败"
+    info = vector_store.get_collection_info()
+    log.info("向量存储获取成功，文档数: %s", info['document_count'])
+    expected = len(code_files) + len(issues) + len(prs)
+    assert info['document_count'] == expected, f"文档数错误: {info['document_count']} != {expected}"
+
+@pytest.mark.slow
+def test_integration(embedder, in_memory_store):
+    """
+    测试集成功能（端到端冒烟测试）
+    
+    覆盖的组件已由上面的嵌入模型、ChromaDB、索引器测试分别验证，默认跳过
+    """
+    log.info("初始化所有组件...")
+    
+    # 内存集合每个测试独占，测试结束后由fixture删除
+    store = in_memory_store
+    
+    log.info("嵌入模型: %s", embedder.model_name)
+    log.info("向量存储: %s", store.collection.name)
+    
+    # 测试完整数据流
+    log.info("测试完整数据流...")
+    test_docs = [
+        {
+            "text": "集成测试文档内容，用于验证完整的数据流程和语义搜索功能",
+            "metadata": {"test": "integration", "source": "test", "category": "demo"}
+        }
+    ]
+    
+    store.add_documents(test_docs)
+    
+    # 搜索相关的内容
+    results = store.search_arrays("集成测试文档", n_results=1)
+    
+    assert len(results["scores"]) > 0, "集成测试失败，搜索无结果"
+    log.info("相似度: %.4f", results['scores'][0])
+    
+    # 语料写入时已L2归一化且集合使用内积距离，多个查询一次批量编码后直接检索
+    assert store.space == "ip", f"集合距离度量应为内积: {store.space}"
+    queries = ["集成测试文档", "语义搜索功能", "完整的数据流程"]
+    batch_results = store.search_batch(queries, n_results=1)
+    assert len(batch_results) == len(queries) and all(batch_results), "批量搜索结果缺失"
+    
+    # 单位向量的内积相似度应在0-1之间
+    scores = np.array([hits[0]["score"] for hits in batch_results])
+    assert ((scores >= 0) & (scores <= 1)).all(), f"相似度超出范围: {scores}"
+    log.info("批量查询相似度: %s", np.round(scores, 4).tolist())
+
+@pytest.mark.slow
+def test_embedding_demo(embedder):
+    """运行嵌入模型演示"""
+    log.info("模型: %s", embedder.model_name)
+    log.info("维度: %s", embedder.dimensions)
+    
+    # 测试中英文混合
+    texts = [
+        "Python programming language",
+        "向量数据库ChromaDB",
+        "大型语言模型LLM"
+    ]
+    
+    embeddings = embedder.get_embeddings(texts)
+    log.info("嵌入形状: %s", embeddings.shape)
+    
+    # 测试相似度
+    similarities = embedder.compute_similarity("编程语言", texts)
+    assert len(similarities) == len(texts)
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-n", "auto"]))
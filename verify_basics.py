@@ -1,6 +1,12 @@
 # verify_basics.py - 基础验证
 import sys
 import os
+import importlib.util
+
+# 固定Hugging Face缓存到仓库内的 .cache/hf，多次运行复用同一份已下载的模型
+_HF_CACHE = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache", "hf")
+os.environ.setdefault("HF_HOME", _HF_CACHE)
+os.environ.setdefault("TRANSFORMERS_CACHE", _HF_CACHE)
 
 print("=" * 60)
 print("基础环境验证")
@@ -27,13 +33,13 @@ modules_to_test = [
     "github"
 ]
 
+# 只检查模块是否已安装，不执行模块代码（sentence_transformers会连带导入torch，非常慢）
 all_imports_ok = True
 for module in modules_to_test:
-    try:
-        __import__(module)
+    if importlib.util.find_spec(module) is not None:
         print(f"  ✅ {module}")
-    except ImportError as e:
-        print(f"  ❌ {module}: {e}")
+    else:
+        print(f"  ❌ {module}: 未安装")
         all_imports_ok = False
 
 # 4. 测试配置文件
@@ -48,14 +54,18 @@ except Exception as e:
     print(f"  ❌ 导入失败: {e}")
     all_imports_ok = False
 
-# 5. 测试功能
+# 5. 测试功能（加载模型较慢，仅在 --deep 时执行）
+deep = "--deep" in sys.argv
 print("\n测试基本功能:")
-if all_imports_ok:
+if not deep:
+    print("  跳过（使用 python verify_basics.py --deep 运行模型功能测试）")
+elif all_imports_ok:
     try:
         # 测试sentence-transformers
         from sentence_transformers import SentenceTransformer
-        model = SentenceTransformer('all-MiniLM-L6-v2')
-        embedding = model.encode("test")
+        model = SentenceTransformer('all-MiniLM-L6-v2', cache_folder=os.environ["TRANSFORMERS_CACHE"], device="cpu")
+        # 走批量编码路径（与项目中get_embeddings的调用方式一致）
+        embedding = model.encode(["test"] * 4, batch_size=4, convert_to_numpy=True)[0]
         print(f"  ✅ 嵌入模型: 工作正常 (维度: {len(embedding)})")
         
         # 测试chromadb
@@ -3,6 +3,7 @@
 """
 import os
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 # ============ 关键：在导入之前设置镜像源 ============
@@ -13,7 +14,12 @@ project_root = Path(__file__).parent
 sys.path.append(str(project_root))
 
 def verify_all_components():
-    """验证所有组件"""
+    """
+    验证所有组件
+    
+    Returns:
+        全部通过时返回已初始化的嵌入模型（供集成测试复用），否则返回None
+    """
     print("\n🔍 验证Day 4所有组件")
     print("=" * 60)
     
@@ -23,30 +29,56 @@ def verify_all_components():
         ("3. 数据索引器", "src.vector_store.indexer", "DataIndexer")
     ]
     
+    def load_one(module_path, class_name):
+        """导入组件类；嵌入模型在同一线程内直接实例化，与其他组件的导入重叠进行"""
+        # 动态导入
+        module = __import__(module_path, fromlist=[class_name])
+        cls = getattr(module, class_name)
+        instance = cls() if class_name == "TextEmbeddingModel" else None
+        return cls, instance
+    
     all_passed = True
+    embedder = None
+    
+    print("\n并行导入组件（嵌入模型初始化可能需要几秒钟）...")
     
-    for name, module_path, class_name in components:
+    # 各组件的导入/模型加载以I/O为主且互不依赖，并行执行；
+    # 按提交顺序收集结果，只在主线程中输出和汇总，all_passed 无需加锁
+    with ThreadPoolExecutor(max_workers=3) as executor:
+        futures = [
+            executor.submit(load_one, module_path, class_name)
+            for _, module_path, class_name in components
+        ]
+        results = []
+        for future in futures:
+            try:
+                results.append((future.result(), None))
+            except Exception as e:
+                results.append((None, e))
+    
+    for (name, _, class_name), (loaded, error) in zip(components, results):
         print(f"\n{name}...")
+        if error is not None:
+            print(f"   ❌ 失败: {error}")
+            all_passed = False
+            continue
+        
+        print(f"   ✅ 导入成功: {class_name}")
+        _, instance = loaded
+        if instance is None:
+            continue
+        
         try:
-            # 动态导入
-            module = __import__(module_path, fromlist=[class_name])
-            cls = getattr(module, class_name)
-            print(f"   ✅ 导入成功: {class_name}")
+            embedder = instance
+            print(f"   ✅ 实例化成功")
+            print(f"   ✅ 模型名称: {embedder.model_name}")
+            print(f"   ✅ 嵌入维度: {embedder.dimensions}")
             
-            # 尝试实例化
-            if name == "1. 嵌入模型":
-                print("   正在初始化模型（可能需要几秒钟）...")
-                instance = cls()
-                print(f"   ✅ 实例化成功")
-                print(f"   ✅ 模型名称: {instance.model_name}")
-                print(f"   ✅ 嵌入维度: {instance.dimensions}")
-                
-                # 快速测试
-                test_text = "hello world"
-                embedding = instance.get_embedding(test_text)
-                print(f"   ✅ 测试文本: '{test_text}'")
-                print(f"   ✅ 向量形状: {embedding.shape}")
-                
+            # 快速测试
+            test_text = "hello world"
+            embedding = embedder.get_embedding(test_text)
+            print(f"   ✅ 测试文本: '{test_text}'")
+            print(f"   ✅ 向量形状: {embedding.shape}")
         except Exception as e:
             print(f"   ❌ 失败: {e}")
             all_passed = False
@@ -54,13 +86,18 @@ def verify_all_components():
     print("\n" + "=" * 60)
     if all_passed:
         print("🎉 所有组件验证通过！")
-        return True
+        return embedder
     else:
         print("⚠️ 部分组件存在问题")
-        return False
+        return None
 
-def test_integration():
-    """测试集成"""
+def test_integration(embedder=None):
+    """
+    测试集成
+    
+    Args:
+        embedder: 已初始化的嵌入模型，为None时新建
+    """
     print("\n🔗 测试集成功能...")
     
     try:
@@ -73,14 +110,15 @@ def test_integration():
         
         # 测试1: 嵌入模型
         print("\n1. 测试嵌入模型...")
-        embedder = TextEmbeddingModel()
+        if embedder is None:
+            embedder = TextEmbeddingModel()
         test_texts = ["Python", "ChromaDB", "LLM"]
         embeddings = embedder.get_embeddings(test_texts)
         print(f"   ✅ 嵌入形状: {embeddings.shape}")
         
         # 测试2: ChromaDB存储
         print("\n2. 测试ChromaDB存储...")
-        vector_store = ChromaVectorStore("integration_test")
+        vector_store = ChromaVectorStore("integration_test", embedder=embedder)
         
         # 添加测试文档
         test_docs = [
@@ -104,7 +142,8 @@ def test_integration():
         
         # 测试3: 数据索引器
         print("\n3. 测试数据索引器...")
-        indexer = DataIndexer("integration_test_index")
+        # 与上面的存储共用同一个ChromaDB客户端和嵌入模型
+        indexer = DataIndexer("integration_test_index", embedder=embedder, client=vector_store.client)
         print(f"   ✅ 索引器初始化成功")
         
         # 测试模拟数据索引
@@ -128,22 +167,21 @@ def test_integration():
         return True
         
     except Exception as e:
-        print(f"❌ 集成测试失败: {e}")
-        import traceback
-        traceback.print_exc()
+        print(f"❌ 集成测试失败: {type(e).__name__}: {e}")
         return False
 
 if __name__ == "__main__":
     print("🚀 Day 4 组件验证")
     print("=" * 60)
     
-    if verify_all_components():
+    embedder = verify_all_components()
+    if embedder is not None:
         print("\n📋 准备进行集成测试...")
-        test_integration()
+        test_integration(embedder)
         
         print("\n🎯 下一步:")
         print("1. 运行: python day4_demo.py")
-        print("2. 运行: python test_day4.py")
+        print("2. 运行: python -m pytest tests/test_day4.py")
         print("3. 开始将Day 2和Day 3的数据导入向量存储")
     else:
         print("\n🔧 需要先修复组件问题")
\ No newline at end of file